@@ -4,6 +4,10 @@ import random
 from datetime import datetime, timedelta
 import time
 import requests
+import secrets
+import pandas as pd
+import query_stats
+import ranking
 
 # Page configuration
 st.set_page_config(
@@ -169,6 +173,16 @@ if 'show_login' not in st.session_state:
 if 'show_admin' not in st.session_state:
     st.session_state.show_admin = False
 
+# Attribute this rerun's database queries to the user session
+if 'query_session' not in st.session_state:
+    st.session_state.query_session = secrets.token_hex(8)
+    st.session_state.rerun_count = 0
+st.session_state.rerun_count += 1
+query_stats.start_scope(
+    f"{st.session_state.query_session}:{st.session_state.rerun_count}",
+    session=st.session_state.query_session
+)
+
 # Simulate live count updates
 if 'last_update' not in st.session_state:
     st.session_state.last_update = datetime.now()
@@ -368,7 +382,11 @@ elif st.session_state.active_tab == "prayer":
     st.divider()
     
     # All Prayers
-    for prayer in st.session_state.prayers:
+    sort_order = st.radio("Sort by", ["🔥 Hot", "🕒 Newest"], horizontal=True, label_visibility="collapsed")
+    wall = st.session_state.prayers
+    if sort_order == "🔥 Hot":
+        wall = sorted(wall, key=lambda p: ranking.priority(p['type'], p.get('urgency', 5), p['count']), reverse=True)
+    for prayer in wall:
         prayer_card(prayer)
 
 # Media Tab
@@ -603,6 +621,32 @@ if st.session_state.show_admin and st.session_state.user and st.session_state.us
                     for prayer in st.session_state.prayers:
                         st.progress(min(prayer['count'] / 200, 1.0), 
                                   text=f"{prayer['title']}: {prayer['count']} prayers")
+                    
+                    st.subheader("Database Queries")
+                    query_summary = query_stats.summary()
+                    session_queries = query_stats.session_summary(st.session_state.query_session)
+                    col_q1, col_q2, col_q3 = st.columns(3)
+                    with col_q1:
+                        st.metric("Queries (all sessions)", query_summary['queries'])
+                    with col_q2:
+                        st.metric("Avg Latency", f"{query_summary['avg_ms']:.1f} ms")
+                    with col_q3:
+                        st.metric("Queries (this session)", session_queries['queries'])
+                    st.bar_chart(pd.DataFrame(
+                        {'queries': list(query_summary['histogram'].values())},
+                        index=list(query_summary['histogram'].keys())
+                    ))
+                    if query_summary['top_statements']:
+                        st.dataframe(pd.DataFrame([
+                            {
+                                'statement': s['statement'][:120],
+                                'count': s['count'],
+                                'avg_ms': round(s['avg_ms'], 2),
+                                'max_ms': round(s['max_ms'], 2),
+                                'call_site': max(s['call_sites'], key=s['call_sites'].get) if s['call_sites'] else ''
+                            }
+                            for s in query_summary['top_statements']
+                        ]))
                 
                 with tab_admin2:
                     st.subheader("Manage Prayer Requests")
@@ -0,0 +1,147 @@
+import atexit
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, func, text
+from database import PrayerRequest, PrayerResponse, PrayerRequestArchive, PrayerResponseArchive
+
+ARCHIVE_AFTER_DAYS = 180  # answered this long ago -> archive
+HORIZON_CHECK_INTERVAL = 60  # seconds the newest archived created_at is cached
+
+_partitions = weakref.WeakKeyDictionary()  # engine -> partition names known to exist
+_horizons = weakref.WeakKeyDictionary()
+
+def _months(start, end):
+    """First day of every month from ``start`` through ``end``"""
+    month = datetime(start.year, start.month, 1)
+    while month <= end:
+        yield month
+        month = datetime(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+def ensure_partitions(connection, table, start, end):
+    """Create the monthly partitions of ``table`` covering [start, end] (PostgreSQL only)"""
+    if connection.dialect.name != 'postgresql' or start is None:
+        return
+    known = _partitions.setdefault(connection.engine, set())
+    for month in _months(start, end):
+        name = f"{table.name}_y{month.year}m{month.month:02d}"
+        if name in known:
+            continue
+        following = datetime(month.year + (month.month == 12), month.month % 12 + 1, 1)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table.name} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+        ))
+        known.add(name)
+
+def _copy(connection, source, target, condition):
+    columns = [c.name for c in target.columns]
+    connection.execute(insert(target).from_select(columns, select(*[source.c[n] for n in columns]).where(condition)))
+    return connection.execute(delete(source).where(condition)).rowcount
+
+def archive_answered(engine, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=1000, max_batches=None, pause=0):
+    """Move answered prayer requests (and their responses) to the archive tables
+
+    Requests answered more than ``older_than_days`` ago are moved in id
+    order, ``batch_size`` per transaction, sleeping ``pause`` seconds between
+    batches to leave room for the app's own queries. Returns the counts.
+    """
+    prayers, responses = PrayerRequest.__table__, PrayerResponse.__table__
+    prayer_archive, response_archive = PrayerRequestArchive.__table__, PrayerResponseArchive.__table__
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = {'prayers': 0, 'responses': 0, 'batches': 0}
+    last_id = 0
+
+    while max_batches is None or moved['batches'] < max_batches:
+        with engine.begin() as connection:
+            ids = connection.execute(
+                select(prayers.c.id)
+                .where(
+                    prayers.c.id > last_id,
+                    prayers.c.status == 'answered',
+                    prayers.c.created_at.is_not(None),
+                    func.coalesce(prayers.c.answered_at, prayers.c.created_at) < cutoff,
+                )
+                .order_by(prayers.c.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+
+            prayer_span = connection.execute(
+                select(func.min(prayers.c.created_at), func.max(prayers.c.created_at)).where(prayers.c.id.in_(ids))
+            ).one()
+            response_span = connection.execute(
+                select(func.min(responses.c.created_at), func.max(responses.c.created_at))
+                .where(responses.c.prayer_id.in_(ids))
+            ).one()
+            ensure_partitions(connection, prayer_archive, *prayer_span)
+            ensure_partitions(connection, response_archive, *response_span)
+
+            moved['responses'] += _copy(connection, responses, response_archive, responses.c.prayer_id.in_(ids))
+            moved['prayers'] += _copy(connection, prayers, prayer_archive, prayers.c.id.in_(ids))
+        moved['batches'] += 1
+        last_id = ids[-1]
+        if pause:
+            time.sleep(pause)
+
+    if moved['prayers']:
+        _horizons.pop(engine, None)
+    return moved
+
+def archive_horizon(engine):
+    """Newest created_at in the prayer archive (cached briefly); None if empty"""
+    checked = _horizons.get(engine)
+    if checked and time.monotonic() - checked[0] < HORIZON_CHECK_INTERVAL:
+        return checked[1]
+    with engine.connect() as connection:
+        horizon = connection.execute(select(func.max(PrayerRequestArchive.created_at))).scalar()
+    _horizons[engine] = (time.monotonic(), horizon)
+    return horizon
+
+def needs_archive(engine, filters):
+    """Whether a feed query with ``filters`` can match archived rows"""
+    if not filters:
+        return False
+    if filters.get('include_archived'):
+        return True
+    date_from = filters.get('date_from')
+    if not date_from:
+        return False
+    if not isinstance(date_from, datetime):
+        date_from = datetime.combine(date_from, datetime.min.time())
+    horizon = archive_horizon(engine)
+    return horizon is not None and date_from <= horizon
+
+class Archiver:
+    """Background thread running archive_answered() every ``interval`` seconds"""
+
+    def __init__(self, engine, interval=3600, **options):
+        self.engine = engine
+        self.interval = interval
+        self.options = options
+        self.last_result = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='prayer-archiver', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_result = archive_answered(self.engine, **self.options)
+            except Exception as e:
+                self.last_result = {'error': str(e)}
+
+    def stop(self):
+        self._stop.set()
+
+_archivers = {}
+
+def start_archiver(engine, interval=3600, **options):
+    """One archiver thread per engine"""
+    archiver = _archivers.get(id(engine))
+    if archiver is None:
+        archiver = _archivers[id(engine)] = Archiver(engine, interval, **options)
+    return archiver
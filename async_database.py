@@ -0,0 +1,186 @@
+import asyncio
+import json
+import time
+import weakref
+from datetime import datetime
+from sqlalchemy import select, func, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from database import (
+    Base, PrayerRequest, PrayerResponse, User, POOL_DEFAULTS, counter_update, sync_entity_tags,
+    _bump_rollup, _sqlite_on_connect, _pool_options_from_secrets, database_url_for,
+    build_feed_query, materialize_feed, build_dashboard_stats_query, summarize_dashboard_stats,
+)
+import query_stats
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'mysql': 'mysql+aiomysql', 'sqlite': 'sqlite+aiosqlite'}
+
+# Async pools hold connections bound to the event loop that opened them,
+# so engines are shared per loop rather than process-wide
+_engines = weakref.WeakKeyDictionary()
+# loop -> DSNs whose schema that loop's engine has created; per loop, not per
+# DSN, because an in-memory SQLite database is new for every engine
+_bootstrapped = weakref.WeakKeyDictionary()
+
+async def get_async_engine(db_type, connection_string, bootstrap_schema=True, **pool_options):
+    """Return this event loop's engine for a DSN, creating the schema once per engine"""
+    loop = asyncio.get_running_loop()
+    loop_engines = _engines.setdefault(loop, {})
+    engine = loop_engines.get(connection_string)
+    if engine is None:
+        if db_type == 'sqlite' and connection_string.endswith('://'):
+            options = {'poolclass': StaticPool}
+        elif db_type == 'sqlite':
+            options = {}
+        else:
+            options = dict(POOL_DEFAULTS)
+            options.update(pool_options)
+        engine = create_async_engine(connection_string, **options)
+        if db_type == 'sqlite':
+            event.listen(engine.sync_engine, 'connect', _sqlite_on_connect)
+        query_stats.instrument_engine(engine.sync_engine)
+        loop_engines[connection_string] = engine
+
+    bootstrapped = _bootstrapped.setdefault(loop, set())
+    if bootstrap_schema and connection_string not in bootstrapped:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        bootstrapped.add(connection_string)
+    return engine
+
+async def dispose_async_engines():
+    """Close the running loop's pooled connections"""
+    loop = asyncio.get_running_loop()
+    _bootstrapped.pop(loop, None)
+    for engine in _engines.pop(loop, {}).values():
+        await engine.dispose()
+
+class AsyncDatabaseManager:
+    """asyncio counterpart of DatabaseManager for the hot paths
+
+    Methods mirror DatabaseManager and return the same result dicts, so
+    independent queries for one page can run together::
+
+        stats, feed = await asyncio.gather(db.get_dashboard_stats(), db.get_prayer_requests())
+
+    Counters are always applied immediately (no background buffer).
+    """
+
+    def __init__(self, db_type='postgresql', use_stats_rollup=False, database_url=None,
+                 sqlite_path=None, stats_ttl=60, **pool_options):
+        self.db_type = db_type
+        self.database_url = database_url  # explicit async DSN; skips the secrets lookup
+        self.sqlite_path = sqlite_path
+        self.use_stats_rollup = use_stats_rollup
+        self.stats_ttl = stats_ttl  # seconds
+        self.pool_options = pool_options
+        self.engine = None
+        self.Session = None
+        self._stats = None
+        self._stats_lock = None
+
+    async def connect(self):
+        """Open (or reuse) the pooled async engine; returns True on success"""
+        try:
+            connection_string = self.database_url or database_url_for(
+                self.db_type, self.sqlite_path, ASYNC_DRIVERS
+            )
+            pool_options = {} if self.db_type == 'sqlite' else _pool_options_from_secrets()
+            pool_options.update(self.pool_options)
+            self.engine = await get_async_engine(self.db_type, connection_string, **pool_options)
+            self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+            self._stats_lock = asyncio.Lock()
+            return True
+        except Exception:
+            return False
+
+    async def add_prayer_request(self, prayer_data):
+        """Add new prayer request to database"""
+        async with self.Session() as session:
+            try:
+                new_prayer = PrayerRequest(
+                    user_id=prayer_data.get('user_id'),
+                    prayer_type=prayer_data.get('prayer_type'),
+                    title=prayer_data.get('title', ''),
+                    description=prayer_data.get('description', ''),
+                    urgency_level=prayer_data.get('urgency_level', 5),
+                    is_anonymous=prayer_data.get('is_anonymous', False),
+                    tags=json.dumps(prayer_data.get('tags', [])),
+                    media_urls=json.dumps(prayer_data.get('media_urls', []))
+                )
+                session.add(new_prayer)
+                await session.flush()
+                await session.run_sync(
+                    sync_entity_tags, 'prayer', {new_prayer.id: prayer_data.get('tags', [])}, False
+                )
+
+                if prayer_data.get('user_id'):
+                    await session.execute(counter_update('user_prayer_count', prayer_data['user_id']))
+                await session.run_sync(
+                    lambda sync_session: _bump_rollup(
+                        sync_session, datetime.utcnow().date(), new_prayer.prayer_type, prayers=1
+                    )
+                )
+                await session.commit()
+                return {'success': True, 'prayer_id': new_prayer.id}
+            except Exception as e:
+                await session.rollback()
+                return {'success': False, 'error': str(e)}
+
+    async def get_prayer_requests(self, filters=None, limit=50, after=None, columns=None, columnar=None, decode_json=True):
+        """Get prayer requests with filters, newest first (see DatabaseManager.get_prayer_requests)"""
+        from archive import needs_archive
+        async with self.Session() as session:
+            try:
+                # Archived rows are merged in under the same rules as the sync feed
+                include_archive = await session.run_sync(
+                    lambda sync_session: needs_archive(sync_session.get_bind(), filters)
+                )
+                query, names, selected = build_feed_query(filters, limit, after, columns, include_archive)
+                rows = (await session.execute(query)).all()
+                return materialize_feed(rows, names, selected, limit, columnar, decode_json)
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+
+    async def add_prayer_response(self, response_data):
+        """Add prayer response (I prayed, comment, amen)"""
+        async with self.Session() as session:
+            try:
+                new_response = PrayerResponse(
+                    prayer_id=response_data['prayer_id'],
+                    user_id=response_data.get('user_id'),
+                    response_type=response_data['response_type'],
+                    comment=response_data.get('comment', ''),
+                    is_anonymous=response_data.get('is_anonymous', False)
+                )
+                session.add(new_response)
+                await session.execute(counter_update('prayer_count', response_data['prayer_id']))
+                await session.commit()
+                return {'success': True, 'response_id': new_response.id}
+            except Exception as e:
+                await session.rollback()
+                return {'success': False, 'error': str(e)}
+
+    async def _compute_dashboard_stats(self):
+        async with self.Session() as session:
+            rows = (await session.execute(build_dashboard_stats_query(self.use_stats_rollup))).all()
+            if rows:
+                total_users = rows[0][4]
+            else:
+                total_users = (await session.execute(select(func.count()).select_from(User))).scalar()
+            return summarize_dashboard_stats(rows, total_users)
+
+    async def get_dashboard_stats(self, use_cache=True):
+        """Get dashboard statistics (cached for ``stats_ttl`` seconds)"""
+        try:
+            if not use_cache:
+                return {'success': True, 'stats': await self._compute_dashboard_stats()}
+            if self._stats and self._stats[0] > time.monotonic():
+                return {'success': True, 'stats': self._stats[1]}
+            # Single flight: concurrent callers wait for one recomputation
+            async with self._stats_lock:
+                if not (self._stats and self._stats[0] > time.monotonic()):
+                    self._stats = (time.monotonic() + self.stats_ttl, await self._compute_dashboard_stats())
+                return {'success': True, 'stats': self._stats[1]}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
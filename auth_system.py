@@ -1,35 +1,59 @@
-```python
 import streamlit as st
-import hashlib
 import secrets
-import jwt
+import hashlib
 import time
 from datetime import datetime, timedelta
 import re
-from email.mime.text import MIMEText
-import smtplib
-from database import DatabaseManager, User
-import pandas as pd
+from database import DatabaseManager, User, PasswordResetToken, user_display_cache, user_profile_cache
+from sqlalchemy import update, func, select, insert
+from sqlalchemy.exc import IntegrityError
+from password_hashing import get_password_hasher, HasherBusy, DEFAULT_SCHEME
+from jwt_tokens import get_token_verifier, DEFAULT_KID
+from email_outbox import enqueue_email, start_outbox_worker
+
+# Fields served from user_profile_cache to the sidebar and profile tab
+PROFILE_FIELDS = ('id', 'username', 'email', 'full_name', 'phone', 'location', 'profile_pic',
+                  'user_type', 'prayer_count', 'is_verified', 'created_at')
+
+RESET_TOKEN_TTL = timedelta(hours=1)
+
+def reset_token_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def login_filter(identifier):
+    """One indexed, case-insensitive lookup: email if it contains '@', else username"""
+    identifier = identifier.strip().lower()
+    if '@' in identifier:
+        return func.lower(User.email) == identifier
+    return func.lower(User.username) == identifier
 
 class AuthSystem:
     def __init__(self):
-        self.db_manager = DatabaseManager()
+        self.db_manager = DatabaseManager(state=st.session_state)
+        # Cheap on every rerun: reuses the process-wide pooled engine
+        self.db_manager.connect(announce=False)
+        if self.db_manager.engine is not None:
+            # One worker per engine: drains mail left queued by a previous process
+            start_outbox_worker(self.db_manager.engine)
         self.secret_key = st.secrets.get("JWT_SECRET_KEY", "your-secret-key-change-in-production")
         self.token_expiry = 24 * 60 * 60  # 24 hours
+        self.app_url = st.secrets.get("APP_URL", "https://your-app.com").rstrip('/')
+        # Key rotation: JWT_KEYS maps key ids to secrets, JWT_ACTIVE_KID signs new tokens
+        jwt_keys = dict(st.secrets.get("JWT_KEYS", {})) or {DEFAULT_KID: self.secret_key}
+        self.token_verifier = get_token_verifier(jwt_keys, st.secrets.get("JWT_ACTIVE_KID", DEFAULT_KID))
+        # Shared worker pool; the cost is log2(N) for scrypt, iterations for PBKDF2
+        cost = st.secrets.get("PASSWORD_HASH_COST")
+        self.password_hasher = get_password_hasher(
+            st.secrets.get("PASSWORD_HASH_SCHEME", DEFAULT_SCHEME), int(cost) if cost else None
+        )
         
     def hash_password(self, password):
-        """Hash password using SHA-256 with salt"""
-        salt = secrets.token_hex(16)
-        hashed = hashlib.sha256((password + salt).encode()).hexdigest()
-        return f"{salt}${hashed}"
+        """Hash password with the configured KDF (self-describing format)"""
+        return self.password_hasher.hash(password)
     
     def verify_password(self, password, hashed_password):
-        """Verify password against hash"""
-        try:
-            salt, hashed = hashed_password.split('$')
-            return hashlib.sha256((password + salt).encode()).hexdigest() == hashed
-        except:
-            return False
+        """Verify password against hash (any supported format, including legacy salt$hash)"""
+        return self.password_hasher.verify(password, hashed_password)[0]
     
     def validate_email(self, email):
         """Validate email format"""
@@ -59,22 +83,32 @@ class AuthSystem:
         if not is_valid:
             return {'success': False, 'error': message}
         
-        # Check if user exists
+        email = user_data['email'].strip().lower()
+        username = user_data['username'].strip()
+        # Login treats any identifier containing '@' as an email
+        if '@' in username:
+            return {'success': False, 'error': "Username cannot contain '@'"}
+        
+        # Check if user exists (two index lookups, case-insensitive)
         session = self.db_manager.Session()
         try:
-            existing_user = session.query(User).filter(
-                (User.email == user_data['email']) | 
-                (User.username == user_data['username'])
-            ).first()
+            existing_user = (
+                session.query(User.id).filter(login_filter(email)).first()
+                or session.query(User.id).filter(func.lower(User.username) == username.lower()).first()
+            )
             
             if existing_user:
                 return {'success': False, 'error': 'User already exists'}
             
             # Create new user
+            try:
+                password_hash = self.hash_password(user_data['password'])
+            except HasherBusy:
+                return {'success': False, 'error': 'Server is busy, please try again in a moment'}
             new_user = User(
-                username=user_data['username'],
-                email=user_data['email'],
-                password_hash=self.hash_password(user_data['password']),
+                username=username,
+                email=email,
+                password_hash=password_hash,
                 full_name=user_data.get('full_name', ''),
                 phone=user_data.get('phone', ''),
                 location=user_data.get('location', ''),
@@ -83,6 +117,7 @@ class AuthSystem:
             
             session.add(new_user)
             session.commit()
+            self.db_manager._mark_write()
             
             # Send verification email
             self.send_verification_email(new_user.email, new_user.id)
@@ -92,6 +127,10 @@ class AuthSystem:
                 'user_id': new_user.id,
                 'message': 'Registration successful! Please check your email for verification.'
             }
+        except IntegrityError:
+            # Lost a race with a concurrent registration for the same email/username
+            session.rollback()
+            return {'success': False, 'error': 'User already exists'}
         except Exception as e:
             session.rollback()
             return {'success': False, 'error': str(e)}
@@ -100,13 +139,11 @@ class AuthSystem:
     
     def login_user(self, email_or_username, password):
         """Authenticate user"""
-        session = self.db_manager.Session()
+        # The lookup may be served by a replica; the last_login write goes to the primary
+        session = self.db_manager.read_session()
         try:
             # Find user by email or username
-            user = session.query(User).filter(
-                (User.email == email_or_username) | 
-                (User.username == email_or_username)
-            ).first()
+            user = session.query(User).filter(login_filter(email_or_username)).first()
             
             if not user:
                 return {'success': False, 'error': 'User not found'}
@@ -114,12 +151,23 @@ class AuthSystem:
             if not user.is_active:
                 return {'success': False, 'error': 'Account is deactivated'}
             
-            if not self.verify_password(password, user.password_hash):
+            try:
+                matches, needs_rehash = self.password_hasher.verify(password, user.password_hash)
+            except HasherBusy:
+                return {'success': False, 'error': 'Server is busy, please try again in a moment'}
+            if not matches:
                 return {'success': False, 'error': 'Invalid password'}
             
-            # Update last login
-            user.last_login = datetime.utcnow()
-            session.commit()
+            # Update last login, upgrading legacy or outdated hashes while we have the password
+            values = {'last_login': datetime.utcnow()}
+            if needs_rehash:
+                try:
+                    values['password_hash'] = self.hash_password(password)
+                except HasherBusy:
+                    pass  # upgraded on a later login
+            with self.db_manager.engine.begin() as connection:
+                connection.execute(update(User).where(User.id == user.id).values(**values))
+            self.db_manager._mark_write()
             
             # Create JWT token
             token = self.create_jwt_token(user.id, user.user_type)
@@ -149,17 +197,15 @@ class AuthSystem:
             'exp': time.time() + self.token_expiry,
             'iat': time.time()
         }
-        return jwt.encode(payload, self.secret_key, algorithm='HS256')
+        return self.token_verifier.sign(payload)
     
     def verify_jwt_token(self, token):
-        """Verify JWT token"""
-        try:
-            payload = jwt.decode(token, self.secret_key, algorithms=['HS256'])
-            return {'success': True, 'payload': payload}
-        except jwt.ExpiredSignatureError:
-            return {'success': False, 'error': 'Token expired'}
-        except jwt.InvalidTokenError:
-            return {'success': False, 'error': 'Invalid token'}
+        """Verify JWT token (cached per process once its signature has been checked)"""
+        return self.token_verifier.verify(token)
+    
+    def revoke_jwt_token(self, token):
+        """Reject this token from now on (e.g. on logout)"""
+        return {'success': self.token_verifier.revoke(token)}
     
     def send_verification_email(self, email, user_id):
         """Send email verification link"""
@@ -186,37 +232,125 @@ class AuthSystem:
         </html>
         """
         
-        # Send email (configure SMTP in secrets)
+        # Queued; the outbox worker delivers it over a reused SMTP connection
         try:
-            msg = MIMEText(body, 'html')
-            msg['Subject'] = subject
-            msg['From'] = st.secrets['EMAIL_FROM']
-            msg['To'] = email
-            
-            # Connect to SMTP server
-            with smtplib.SMTP(st.secrets['SMTP_SERVER'], st.secrets['SMTP_PORT']) as server:
-                server.starttls()
-                server.login(st.secrets['EMAIL_USER'], st.secrets['EMAIL_PASSWORD'])
-                server.send_message(msg)
-            
+            enqueue_email(self.db_manager.engine, email, subject, body)
             return True
         except Exception as e:
-            st.error(f"Failed to send email: {str(e)}")
+            st.error(f"Failed to queue email: {str(e)}")
             return False
     
     def reset_password(self, email):
         """Send password reset email"""
-        # Generate reset token
+        message = 'If an account exists for that email, a password reset link has been sent'
+        session = self.db_manager.read_session()
+        try:
+            user = session.execute(
+                select(User.id, User.email, User.full_name).where(login_filter(email), User.is_active == True)
+            ).first()
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+        
+        # Same answer whether or not the account exists
+        if user is None:
+            return {'success': True, 'message': message}
+        
+        # Only a hash of the token is stored; the link carries the token itself
         reset_token = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+        reset_url = f"{self.app_url}/?reset_token={reset_token}"
         
-        # Store token in database with expiry
+        subject = "Reset Your Vakyadharam Password"
+        body = f"""
+        <html>
+        <body>
+            <h2>Password reset requested 🙏</h2>
+            <p>Hello {user.full_name or ''},</p>
+            <p>Click the link below to choose a new password:</p>
+            <p><a href="{reset_url}" style="background-color: #4CAF50; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Reset Password</a></p>
+            <p>Or copy this link: {reset_url}</p>
+            <p>This link will expire in 1 hour. If you did not request it, you can ignore this email.</p>
+            <p>Blessings,<br>The Vakyadharam Team</p>
+        </body>
+        </html>
+        """
+        try:
+            with self.db_manager.engine.begin() as connection:
+                connection.execute(insert(PasswordResetToken).values(
+                    user_id=user.id, token_hash=reset_token_hash(reset_token),
+                    expires_at=now + RESET_TOKEN_TTL, created_at=now,
+                ))
+            self.db_manager._mark_write()
+            enqueue_email(self.db_manager.engine, user.email, subject, body)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        return {'success': True, 'message': message}
+    
+    def confirm_password_reset(self, reset_token, new_password):
+        """Set a new password using an emailed reset token (single use, expires)"""
+        is_valid, message = self.validate_password(new_password)
+        if not is_valid:
+            return {'success': False, 'error': message}
         
-        reset_url = f"https://your-app.com/reset-password?token={reset_token}"
+        try:
+            password_hash = self.hash_password(new_password)
+        except HasherBusy:
+            return {'success': False, 'error': 'Server is busy, please try again in a moment'}
         
-        # Send email
-        # Similar to verification email
+        invalid = {'success': False, 'error': 'This reset link is invalid or has expired'}
+        now = datetime.utcnow()
+        try:
+            with self.db_manager.engine.begin() as connection:
+                row = connection.execute(
+                    select(PasswordResetToken.id, PasswordResetToken.user_id).where(
+                        PasswordResetToken.token_hash == reset_token_hash(reset_token or ''),
+                        PasswordResetToken.used_at.is_(None),
+                        PasswordResetToken.expires_at > now,
+                    )
+                ).first()
+                if row is None:
+                    return invalid
+                # Claim the token; a concurrent use of the same link loses here
+                claimed = connection.execute(
+                    update(PasswordResetToken)
+                    .where(PasswordResetToken.id == row.id, PasswordResetToken.used_at.is_(None))
+                    .values(used_at=now)
+                ).rowcount
+                if not claimed:
+                    return invalid
+                connection.execute(update(User).where(User.id == row.user_id).values(password_hash=password_hash))
+                # Any other outstanding links for this account stop working too
+                connection.execute(
+                    update(PasswordResetToken)
+                    .where(PasswordResetToken.user_id == row.user_id, PasswordResetToken.used_at.is_(None))
+                    .values(used_at=now)
+                )
+            self.db_manager._mark_write()
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        return {'success': True, 'message': 'Your password has been reset. You can now log in.'}
+    
+    def get_user_profile(self, user_id):
+        """Profile fields for the sidebar/profile tab, cached per process"""
+        cached, missing = user_profile_cache.get_many([user_id])
+        if not missing:
+            return {'success': True, 'user': dict(cached[user_id])}
         
-        return {'success': True, 'message': 'Password reset email sent'}
+        session = self.db_manager.read_session()
+        try:
+            row = session.execute(
+                select(*[getattr(User, field) for field in PROFILE_FIELDS]).where(User.id == user_id)
+            ).mappings().first()
+            if row is None:
+                return {'success': False, 'error': 'User not found'}
+            user_profile_cache.put_many({user_id: dict(row)})
+            return {'success': True, 'user': dict(row)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
     
     def update_user_profile(self, user_id, profile_data):
         """Update user profile"""
@@ -237,6 +371,10 @@ class AuthSystem:
                 user.profile_pic = profile_data['profile_pic']
             
             session.commit()
+            # The next reads (this rerun's profile reload) must not see a lagging replica
+            self.db_manager._mark_write()
+            user_display_cache.invalidate(user_id)
+            user_profile_cache.invalidate(user_id)
             return {'success': True, 'message': 'Profile updated'}
         except Exception as e:
             session.rollback()
@@ -253,8 +391,26 @@ def authentication_ui():
     auth_system = AuthSystem()
     
     with tab1:
+        # Arrived from a password reset email
+        reset_token = st.query_params.get("reset_token")
+        if reset_token:
+            st.subheader("Choose a New Password")
+            with st.form("reset_password_form"):
+                new_password = st.text_input("New Password", type="password")
+                confirm_password = st.text_input("Confirm New Password", type="password")
+                if st.form_submit_button("Reset Password"):
+                    if new_password != confirm_password:
+                        st.error("Passwords do not match")
+                    else:
+                        result = auth_system.confirm_password_reset(reset_token, new_password)
+                        if result['success']:
+                            st.success(result['message'])
+                            del st.query_params["reset_token"]
+                        else:
+                            st.error(result['error'])
+
         st.subheader("Login to Your Account")
-        
+
         login_method = st.radio("Login with:", ["Email", "Username"])
         
         if login_method == "Email":
@@ -337,6 +493,9 @@ def authentication_ui():
             st.subheader("Your Profile")
             
             user = st.session_state.user
+            profile = auth_system.get_user_profile(user['id'])
+            if profile['success']:
+                user = {**user, **profile['user']}
             
             col1, col2 = st.columns([1, 2])
             with col1:
@@ -351,8 +510,8 @@ def authentication_ui():
                 with st.form("profile_form"):
                     full_name = st.text_input("Full Name", value=user.get('full_name', ''))
                     email = st.text_input("Email", value=user.get('email', ''), disabled=True)
-                    phone = st.text_input("Phone", value="")
-                    location = st.text_input("Location", value="")
+                    phone = st.text_input("Phone", value=user.get('phone') or "")
+                    location = st.text_input("Location", value=user.get('location') or "")
                     
                     if st.form_submit_button("Update Profile"):
                         profile_data = {
@@ -382,6 +541,7 @@ def authentication_ui():
             
             # User Activity
             st.subheader("Recent Activity")
+            import pandas as pd
             activity_data = pd.DataFrame({
                 'Date': ['2024-01-15', '2024-01-10', '2024-01-05'],
                 'Activity': ['Prayed for healing', 'Commented on prayer', 'Submitted prayer request'],
@@ -409,10 +569,48 @@ def authentication_ui():
             if st.button("Export Users List"):
                 st.success("Export started...")
             
-            if st.button("Send Bulk Email"):
-                email_content = st.text_area("Email Content")
-                if st.button("Send to All Users"):
-                    st.success("Email sent to all users!")
+            import bulk_email
+            engine = auth_system.db_manager.engine
+
+            st.write("### Bulk Email")
+            with st.form("bulk_email_form"):
+                email_subject = st.text_input("Subject")
+                email_content = st.text_area("Email Content (HTML; $full_name, $username and $email are filled in)")
+                recipients = st.selectbox("Recipients", ["All", "user", "admin", "moderator"])
+                if st.form_submit_button("Send to All Users"):
+                    if not email_subject or not email_content:
+                        st.error("Subject and content are required")
+                    else:
+                        job_id = bulk_email.create_job(
+                            engine, email_subject, email_content,
+                            user_type=None if recipients == "All" else recipients,
+                            created_by=st.session_state.user['id'],
+                        )
+                        bulk_email.start_job(engine, job_id)
+                        st.success(f"Bulk email job #{job_id} started")
+
+            # Progress of recent jobs; running jobs checkpoint after every chunk
+            for job in bulk_email.list_jobs(engine, limit=5):
+                st.write(f"**#{job['id']} {job['subject']}** ({job['status']})")
+                st.progress(job['fraction'])
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Sent", f"{job['sent_count']:,} / {job['total']:,}")
+                col2.metric("Failed", job['failed_count'])
+                col3.metric("Retrying", job['retried_count'])
+                col4.metric("Emails/sec", f"{job['per_second']:.1f}")
+                if job['status'] == 'running' and st.button("Pause", key=f"pause_job_{job['id']}"):
+                    bulk_email.set_job_status(engine, job['id'], 'paused')
+                    st.rerun()
+                if job['status'] == 'paused' and st.button("Resume", key=f"resume_job_{job['id']}"):
+                    bulk_email.set_job_status(engine, job['id'], 'pending')
+                    bulk_email.start_job(engine, job['id'])
+                    st.rerun()
+                if job['status'] in ('pending', 'running', 'paused') and st.button("Cancel", key=f"cancel_job_{job['id']}"):
+                    bulk_email.set_job_status(engine, job['id'], 'cancelled')
+                    st.rerun()
+            if st.button("Resume interrupted jobs"):
+                resumed = bulk_email.resume_jobs(engine)
+                st.info(f"Resumed {len(resumed)} job(s)")
         else:
             st.warning("Admin access required")
 
@@ -437,10 +635,15 @@ def integrate_auth_in_app():
     with st.sidebar:
         if st.session_state.get('logged_in'):
             user = st.session_state.user
+            profile = AuthSystem().get_user_profile(user['id'])
+            if profile['success']:
+                user = {**user, **profile['user']}
             st.write(f"👤 Welcome, **{user['full_name']}**")
             st.write(f"📊 Prayers: {user.get('prayer_count', 0)}")
             
             if st.button("Logout"):
+                if st.session_state.get('token'):
+                    AuthSystem().revoke_jwt_token(st.session_state.token)
                 del st.session_state.logged_in
                 del st.session_state.user
                 del st.session_state.token
@@ -455,4 +658,3 @@ def integrate_auth_in_app():
         if st.button("Close"):
             del st.session_state.show_auth
             st.rerun()
-```
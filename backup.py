@@ -0,0 +1,288 @@
+import gzip
+import io
+import json
+import os
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, delete, insert, text, DateTime, Date, tuple_
+from database import Base
+from archive import ensure_partitions
+from data_export import parquet_schema
+
+BACKUP_FORMATS = ('jsonl', 'parquet')
+MANIFEST_FILE = 'manifest.json'
+LATEST_FILE = 'LATEST'
+
+# Tables backed up incrementally and the column used as their watermark.
+# prayer_responses is append-only, so created_at is enough; every other
+# table (including users, whose counters change without a timestamp) is
+# copied in full on each run.
+INCREMENTAL_COLUMNS = {
+    'prayer_requests': 'updated_at',
+    'blog_posts': 'updated_at',
+    'prayer_responses': 'created_at',
+}
+# Rows archive.archive_answered() moves out of an incrementally backed-up
+# table. The archive tables are copied in full, so on restore any live row
+# whose id is also archived is a tombstone and is deleted.
+ARCHIVED_TO = {
+    'prayer_requests': 'prayer_requests_archive',
+    'prayer_responses': 'prayer_responses_archive',
+}
+ARCHIVE_TABLES = set(ARCHIVED_TO.values())
+
+# The next incremental starts this far before the snapshot began, so rows
+# stamped by a transaction that was still open at snapshot time (and so
+# invisible to it) are picked up next time. Must exceed the longest write
+# transaction; re-exported rows are harmless since restore upserts by key.
+WATERMARK_SKEW = timedelta(minutes=5)
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _decoders(table):
+    """Per-column functions turning JSON values back into Python types"""
+    decoders = {}
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            decoders[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            decoders[column.name] = date.fromisoformat
+    return decoders
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression requires the 'zstandard' package")
+    return zstandard
+
+def _open_write(path, compression):
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8')
+    if compression == 'zstd':
+        return io.TextIOWrapper(_zstandard().ZstdCompressor().stream_writer(open(path, 'wb')), encoding='utf-8')
+    if compression:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return open(path, 'w', encoding='utf-8')
+
+def _open_read(path, compression):
+    if compression == 'gzip':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if compression == 'zstd':
+        return io.TextIOWrapper(_zstandard().ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def _file_name(table_name, fmt, compression):
+    if fmt == 'parquet':
+        return f"{table_name}.parquet"
+    suffix = {'gzip': '.gz', 'zstd': '.zst'}.get(compression, '')
+    return f"{table_name}.jsonl{suffix}"
+
+def _iter_table_chunks(connection, table, watermark_column, since, chunk_size):
+    """Stream a table in primary-key order through a server-side cursor"""
+    query = select(table).order_by(*table.primary_key.columns)
+    if watermark_column and since:
+        query = query.where(table.c[watermark_column] >= datetime.fromisoformat(since))
+    result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+    for partition in result.mappings().partitions(chunk_size):
+        yield [dict(row) for row in partition]
+
+def _write_table(path, table, chunks, fmt, compression):
+    """Write chunks to one file; returns the row count"""
+    rows = 0
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = parquet_schema(pa, table)
+        with pq.ParquetWriter(path, schema, compression=compression or 'snappy') as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                rows += len(chunk)
+    else:
+        with _open_write(path, compression) as output:
+            for chunk in chunks:
+                output.write(''.join(
+                    json.dumps({key: _encode(value) for key, value in row.items()}) + '\n'
+                    for row in chunk
+                ))
+                rows += len(chunk)
+    return rows
+
+def _read_manifest(backup_dir):
+    with open(os.path.join(backup_dir, MANIFEST_FILE)) as manifest_file:
+        return json.load(manifest_file)
+
+def latest_backup(dest_dir):
+    """Path of the most recent completed backup in ``dest_dir``, or None"""
+    try:
+        with open(os.path.join(dest_dir, LATEST_FILE)) as latest:
+            return os.path.join(dest_dir, latest.read().strip())
+    except FileNotFoundError:
+        return None
+
+def backup_database(engine, dest_dir, fmt='jsonl', compression='gzip', incremental=False, chunk_size=5000):
+    """Snapshot every table to ``dest_dir/<backup_id>/`` with a manifest
+
+    Tables are streamed one chunk at a time, so memory is bounded by
+    ``chunk_size``. With ``incremental=True`` the tables listed in
+    INCREMENTAL_COLUMNS only export rows at or after the previous backup's
+    watermark (deletes are not captured); the rest are copied in full. The
+    watermark is the snapshot start minus WATERMARK_SKEW, not the newest
+    timestamp seen, so late-committing writes are not skipped.
+    """
+    if fmt not in BACKUP_FORMATS:
+        raise ValueError(f"Unsupported backup format: {fmt}")
+    if fmt == 'jsonl' and compression == 'zstd':
+        _zstandard()  # fail before any file is written (Parquet has its own zstd codec)
+
+    parent_dir = latest_backup(dest_dir) if incremental else None
+    parent = _read_manifest(parent_dir) if parent_dir else None
+
+    backup_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ')
+    backup_dir = os.path.join(dest_dir, backup_id)
+    os.makedirs(backup_dir)
+
+    manifest = {
+        'backup_id': backup_id,
+        'created_at': datetime.utcnow().isoformat(),
+        'format': fmt,
+        'compression': compression,
+        'incremental': parent is not None,
+        'parent': parent['backup_id'] if parent else None,
+        'tables': {},
+    }
+
+    # Taken before the snapshot starts: anything not visible to it is stamped after this
+    watermark = (datetime.utcnow() - WATERMARK_SKEW).isoformat()
+    connection = engine.connect()
+    if engine.dialect.name in ('postgresql', 'mysql'):
+        # One consistent snapshot across all tables
+        connection = connection.execution_options(isolation_level='REPEATABLE READ')
+    try:
+        with connection.begin():
+            for table in Base.metadata.sorted_tables:
+                watermark_column = INCREMENTAL_COLUMNS.get(table.name)
+                since = None
+                if parent and watermark_column:
+                    since = parent['tables'].get(table.name, {}).get('watermark')
+                file_name = _file_name(table.name, fmt, compression)
+                chunks = _iter_table_chunks(connection, table, watermark_column, since, chunk_size)
+                rows = _write_table(os.path.join(backup_dir, file_name), table, chunks, fmt, compression)
+                manifest['tables'][table.name] = {
+                    'file': file_name,
+                    'rows': rows,
+                    'mode': 'incremental' if since else 'full',
+                    'watermark_column': watermark_column,
+                    'watermark': watermark if watermark_column else None,
+                }
+                if since and table.name in ARCHIVED_TO:
+                    manifest['tables'][table.name]['tombstones'] = ARCHIVED_TO[table.name]
+    finally:
+        connection.close()
+
+    with open(os.path.join(backup_dir, MANIFEST_FILE), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    # Publish only once the manifest is complete
+    latest_tmp = os.path.join(dest_dir, LATEST_FILE + '.tmp')
+    with open(latest_tmp, 'w') as latest:
+        latest.write(backup_id)
+    os.replace(latest_tmp, os.path.join(dest_dir, LATEST_FILE))
+    return manifest
+
+def _iter_backup_chunks(path, table, fmt, compression, chunk_size):
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+
+    decoders = _decoders(table)
+    chunk = []
+    with _open_read(path, compression) as source:
+        for line in source:
+            row = json.loads(line)
+            for name, decode in decoders.items():
+                if row.get(name) is not None:
+                    row[name] = decode(row[name])
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def _backup_chain(backup_dir):
+    """Manifests from the last full backup up to ``backup_dir``"""
+    dest_dir = os.path.dirname(os.path.normpath(backup_dir))
+    chain = []
+    manifest = _read_manifest(backup_dir)
+    while True:
+        chain.append((os.path.join(dest_dir, manifest['backup_id']), manifest))
+        if not manifest['parent']:
+            break
+        manifest = _read_manifest(os.path.join(dest_dir, manifest['parent']))
+    return list(reversed(chain))
+
+def restore_database(engine, backup_path, chunk_size=5000):
+    """Load a backup (and its incremental parents) in chunks
+
+    ``backup_path`` is a backup directory, or a destination directory whose
+    latest backup is restored. Full tables are replaced; incremental rows
+    overwrite existing rows with the same primary key, and rows archived
+    since the base backup are removed again (see ARCHIVED_TO).
+    """
+    if os.path.exists(os.path.join(backup_path, LATEST_FILE)):
+        backup_path = latest_backup(backup_path)
+
+    restored = {}
+    tombstones = {}
+    for backup_dir, manifest in _backup_chain(backup_path):
+        for table in Base.metadata.sorted_tables:
+            entry = manifest['tables'].get(table.name)
+            if not entry:
+                continue
+            if entry['mode'] == 'full':
+                with engine.begin() as connection:
+                    connection.execute(delete(table))
+            if entry.get('tombstones'):
+                tombstones[table.name] = entry['tombstones']
+
+            primary_key = list(table.primary_key.columns)
+            path = os.path.join(backup_dir, entry['file'])
+            for chunk in _iter_backup_chunks(path, table, manifest['format'], manifest['compression'], chunk_size):
+                with engine.begin() as connection:
+                    if entry['mode'] == 'incremental':
+                        keys = [tuple(row[column.name] for column in primary_key) for row in chunk]
+                        connection.execute(delete(table).where(tuple_(*primary_key).in_(keys)))
+                    if table.name in ARCHIVE_TABLES:
+                        # Month partitions first: rows in DEFAULT would block creating them later
+                        created = [row['created_at'] for row in chunk if row.get('created_at')]
+                        ensure_partitions(connection, table, min(created, default=None), max(created, default=None))
+                    connection.execute(insert(table), chunk)
+                restored[table.name] = restored.get(table.name, 0) + len(chunk)
+
+    tables = Base.metadata.tables
+    for table_name, archive_name in tombstones.items():
+        table, archive = tables[table_name], tables[archive_name]
+        with engine.connect() as connection:
+            archived = connection.execute(
+                select(archive.c.id).where(archive.c.id.in_(select(table.c.id))).order_by(archive.c.id)
+            ).scalars().all()
+        for start in range(0, len(archived), chunk_size):
+            with engine.begin() as connection:
+                connection.execute(delete(table).where(table.c.id.in_(archived[start:start + chunk_size])))
+        if archived:
+            restored[f"{table_name}.tombstones"] = len(archived)
+
+    if engine.dialect.name == 'postgresql':
+        # Explicit ids were inserted; move sequences past them
+        with engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                if 'id' in table.c and table.c.id.autoincrement is not False and len(table.primary_key.columns) == 1:
+                    connection.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                        f"coalesce((SELECT max(id) FROM {table.name}), 0) + 1, false)"
+                    ))
+    return restored
@@ -0,0 +1,125 @@
+"""Data-layer benchmark suite on SQLite with synthetic data
+
+Seeds a fresh SQLite database per scale and times the DatabaseManager hot
+paths. Results are JSON; pass --baseline with an earlier result file to
+flag regressions (non-zero exit status).
+
+    python benchmarks/bench_data_layer.py --scales 10000 100000 --output results.json
+    python benchmarks/bench_data_layer.py --scales 10000 --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager, stats_cache
+import synthetic_data
+
+def measure(fn, repeat):
+    """Median wall time of ``repeat`` calls, failing loudly on error results"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+        if isinstance(result, dict) and result.get('success') is False:
+            raise RuntimeError(result.get('error'))
+    return {'median_s': statistics.median(samples), 'min_s': min(samples), 'repeat': repeat}
+
+def run_scale(prayers, repeat, workdir):
+    path = os.path.join(workdir, f"bench_{prayers}.db")
+    db_manager = DatabaseManager('sqlite', sqlite_path=path)
+    if not db_manager.connect(announce=False):
+        raise RuntimeError(f"Could not open {path}")
+
+    users = max(prayers // 10, 1)
+    started = time.perf_counter()
+    synthetic_data.generate(
+        db_manager, users=users, prayers=prayers, responses=prayers * 2, notifications=prayers, seed=prayers
+    )
+    seed_seconds = time.perf_counter() - started
+
+    month_ago = datetime.utcnow() - timedelta(days=30)
+    deep_cursor = db_manager.get_prayer_requests(limit=min(prayers // 2, 5000), columns=['id'])['next_cursor']
+    ops = {
+        'add_prayer_request': lambda: db_manager.add_prayer_request(
+            {'user_id': 1, 'prayer_type': 'general', 'title': 'Benchmark', 'tags': ['Healing']}),
+        'add_prayer_response': lambda: db_manager.add_prayer_response(
+            {'prayer_id': 1, 'user_id': 1, 'response_type': 'prayed'}),
+        'get_prayer_requests': lambda: db_manager.get_prayer_requests(),
+        'get_prayer_requests.prayer_type': lambda: db_manager.get_prayer_requests(
+            filters={'prayer_type': 'emergency'}),
+        'get_prayer_requests.user_id': lambda: db_manager.get_prayer_requests(filters={'user_id': 1}),
+        'get_prayer_requests.status': lambda: db_manager.get_prayer_requests(filters={'status': 'answered'}),
+        'get_prayer_requests.date_range': lambda: db_manager.get_prayer_requests(
+            filters={'date_from': month_ago, 'date_to': datetime.utcnow()}),
+        'get_prayer_requests.tags': lambda: db_manager.get_prayer_requests(filters={'tags': ['Healing']}),
+        'get_prayer_requests.deep_cursor': lambda: db_manager.get_prayer_requests(after=deep_cursor),
+        'get_dashboard_stats': lambda: db_manager.get_dashboard_stats(use_cache=False),
+        'export_csv_gzip': lambda: db_manager.export_prayer_requests(
+            os.path.join(workdir, 'export.csv.gz'), compression='gzip'),
+        'export_parquet': lambda: db_manager.export_prayer_requests(
+            os.path.join(workdir, 'export.parquet'), fmt='parquet'),
+    }
+    results = {}
+    for name, fn in ops.items():
+        # Full-table exports are slow at large scales; one run is enough
+        results[name] = measure(fn, 1 if name.startswith('export') else repeat)
+    stats_cache.invalidate()
+    return {'prayers': prayers, 'users': users, 'seed_s': seed_seconds, 'ops': results}
+
+def compare(current, baseline, tolerance):
+    """List ops that got slower than ``baseline`` by more than ``tolerance``"""
+    previous = {run['prayers']: run['ops'] for run in baseline['runs']}
+    regressions = []
+    for run in current['runs']:
+        for name, timing in run['ops'].items():
+            before = previous.get(run['prayers'], {}).get(name)
+            if before and timing['median_s'] > before['median_s'] * (1 + tolerance):
+                regressions.append({
+                    'prayers': run['prayers'],
+                    'op': name,
+                    'baseline_s': before['median_s'],
+                    'current_s': timing['median_s'],
+                })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='vakyadharam-bench-')
+    report = {
+        'benchmark': 'data_layer',
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'runs': [run_scale(prayers, args.repeat, workdir) for prayers in args.scales],
+    }
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            report['regressions'] = compare(report, json.load(baseline_file), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+    return 1 if report.get('regressions') else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Per-row cost of get_prayer_requests() materialization modes
+
+Compares the old ORM-hydration path (full object + two json.loads per row)
+with Core projections, columnar output and skipped JSON decoding.
+
+    python benchmarks/bench_feed_materialization.py --rows 20000 --limit 5000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager, PrayerRequest
+
+UI_COLUMNS = ['id', 'prayer_type', 'urgency_level', 'status', 'created_at', 'prayer_count']
+
+def orm_rows(db_manager, limit):
+    """The pre-projection implementation, kept here as the baseline"""
+    session = db_manager.Session()
+    try:
+        prayers = session.query(PrayerRequest).order_by(PrayerRequest.created_at.desc()).limit(limit).all()
+        result = []
+        for prayer in prayers:
+            prayer_dict = {c.name: getattr(prayer, c.name) for c in prayer.__table__.columns}
+            if prayer_dict.get('tags'):
+                prayer_dict['tags'] = json.loads(prayer_dict['tags'])
+            if prayer_dict.get('media_urls'):
+                prayer_dict['media_urls'] = json.loads(prayer_dict['media_urls'])
+            result.append(prayer_dict)
+        return result
+    finally:
+        session.close()
+
+def timed(fn, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'us_per_row': best / rows * 1e6}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    db_manager = DatabaseManager('sqlite', sqlite_path=path)
+    db_manager.connect(announce=False)
+    db_manager.add_prayer_requests_bulk(
+        {'title': f"Prayer {i}", 'prayer_type': 'general', 'tags': ['Healing', 'Family'],
+         'media_urls': ['https://example.com/a.jpg']}
+        for i in range(args.rows)
+    )
+
+    limit = min(args.limit, args.rows)
+    cases = {
+        'orm_full_rows': lambda: orm_rows(db_manager, limit),
+        'core_full_rows': lambda: db_manager.get_prayer_requests(limit=limit),
+        'core_full_rows_raw_json': lambda: db_manager.get_prayer_requests(limit=limit, decode_json=False),
+        'core_ui_projection': lambda: db_manager.get_prayer_requests(limit=limit, columns=UI_COLUMNS),
+        'core_ui_projection_columnar': lambda: db_manager.get_prayer_requests(
+            limit=limit, columns=UI_COLUMNS, columnar='dict'),
+    }
+    results = {name: timed(fn, limit, args.repeat) for name, fn in cases.items()}
+    print(json.dumps({'benchmark': 'feed_materialization', 'rows': limit, 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
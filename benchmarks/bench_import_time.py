@@ -0,0 +1,114 @@
+"""Cold-start cost of importing the app's modules
+
+Each module is imported in a fresh interpreter with ``-X importtime``, so
+nothing is cached in-process. Reports the median wall time, the heaviest
+imported packages and whether optional heavy dependencies (database
+drivers, pandas, streamlit) were loaded. Pass --baseline with an earlier
+result file to flag regressions (non-zero exit status).
+
+    python benchmarks/bench_import_time.py --output import_time.json
+    python benchmarks/bench_import_time.py --baseline import_time.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ['database', 'auth_system']
+HEAVY = ['psycopg2', 'mysql.connector', 'pandas', 'streamlit', 'pyarrow']
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(repr((elapsed, [name for name in {heavy!r} if name in sys.modules])))
+"""
+
+def run_once(module):
+    """(seconds, heavy modules loaded, {direct import: cumulative us}) from one fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(module=module, heavy=HEAVY)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    elapsed, loaded = eval(completed.stdout.strip().splitlines()[-1])
+    entries = []
+    for line in completed.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", nested names indented
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append(((len(name) - len(name.lstrip())) // 2, name.strip(), int(cumulative)))
+    # Children are listed before their parent: walk back from the module's own line
+    packages = {}
+    end = max(i for i, (depth, name, _) in enumerate(entries) if depth == 0 and name == module)
+    for depth, name, cumulative in reversed(entries[:end]):
+        if depth == 0:
+            break
+        if depth == 1:
+            packages[name] = cumulative
+    return elapsed, loaded, packages
+
+def measure(module, repeat, top):
+    samples = [run_once(module) for _ in range(repeat)]
+    _, loaded, packages = samples[-1]
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'median_s': statistics.median(s[0] for s in samples),
+        'min_s': min(s[0] for s in samples),
+        'repeat': repeat,
+        'heavy_modules_loaded': loaded,
+        'top_imports_ms': {name: us / 1000 for name, us in heaviest},
+    }
+
+def compare(current, baseline, tolerance):
+    """List modules whose import got slower than ``baseline`` by more than ``tolerance``"""
+    regressions = []
+    for module, timing in current['modules'].items():
+        before = baseline['modules'].get(module)
+        if before and timing['median_s'] > before['median_s'] * (1 + tolerance):
+            regressions.append({'module': module, 'baseline_s': before['median_s'], 'current_s': timing['median_s']})
+        if before and set(timing['heavy_modules_loaded']) - set(before['heavy_modules_loaded']):
+            regressions.append({
+                'module': module,
+                'new_heavy_modules': sorted(set(timing['heavy_modules_loaded']) - set(before['heavy_modules_loaded'])),
+            })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--top', type=int, default=10, help='heaviest direct imports to list')
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    report = {
+        'benchmark': 'import_time',
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'modules': {module: measure(module, args.repeat, args.top) for module in args.modules},
+    }
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            report['regressions'] = compare(report, json.load(baseline_file), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+    return 1 if report.get('regressions') else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
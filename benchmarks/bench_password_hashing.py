@@ -0,0 +1,79 @@
+"""Login throughput of the password hashers at each cost setting
+
+Measures verifications per second on one thread (= per core) and through
+a PasswordHasher pool using every core, so a cost can be picked against
+the login rate the deployment must sustain.
+
+    python benchmarks/bench_password_hashing.py
+    python benchmarks/bench_password_hashing.py --scrypt-costs 14 15 --pbkdf2-costs 600000 --seconds 3
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from password_hashing import PasswordHasher
+
+PASSWORD = 'Benchmark-Passw0rd'
+
+def rate(verify, seconds, threads=1):
+    """Verifications per second, run on ``threads`` callers for about ``seconds``"""
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        count = 0
+        while time.perf_counter() < deadline:
+            verify()
+            count += 1
+        return count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as callers:
+        total = sum(callers.map(lambda _: worker(), range(threads)))
+    return total / (time.perf_counter() - started)
+
+def measure(scheme, cost, seconds):
+    cores = os.cpu_count() or 1
+    hasher = PasswordHasher(scheme, cost, max_workers=cores)
+    stored = hasher.hash(PASSWORD)
+    started = time.perf_counter()
+    assert hasher.hasher.verify(PASSWORD, *stored.split('$')[2:])
+    single_ms = (time.perf_counter() - started) * 1000
+    per_core = rate(lambda: hasher.hasher.verify(PASSWORD, *stored.split('$')[2:]), seconds)
+    pooled = rate(lambda: hasher.verify(PASSWORD, stored), seconds, threads=cores * 2)
+    return {
+        'scheme': scheme,
+        'cost': hasher.hasher.cost,
+        'verify_ms': single_ms,
+        'logins_per_sec_per_core': per_core,
+        'logins_per_sec_pool': pooled,
+        'pool_workers': cores,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scrypt-costs', type=int, nargs='*', default=[13, 14, 15, 16], help='log2(N)')
+    parser.add_argument('--pbkdf2-costs', type=int, nargs='*', default=[200000, 600000, 1000000],
+                        help='iterations')
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration of each measurement')
+    args = parser.parse_args()
+
+    results = [measure('scrypt', cost, args.seconds) for cost in args.scrypt_costs]
+    results += [measure('pbkdf2-sha256', cost, args.seconds) for cost in args.pbkdf2_costs]
+    print(json.dumps({
+        'benchmark': 'password_hashing',
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cores': os.cpu_count(),
+        'results': results,
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
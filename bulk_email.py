@@ -0,0 +1,282 @@
+import html
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from string import Template
+from sqlalchemy import select, insert, update, func
+from database import User, BulkEmailJob
+from email_outbox import (SMTPConnection, RateLimiter, build_message, smtp_config, enqueue_email,
+                          start_outbox_worker, is_permanent_failure, keeps_session)
+
+CHUNK_SIZE = 500  # recipients per server-side cursor fetch and progress checkpoint
+CONNECTIONS = 4  # SMTP sessions sending in parallel
+HEARTBEAT_INTERVAL = 30  # seconds between updated_at refreshes while a chunk is being sent
+STALE_AFTER = 300  # seconds without a heartbeat before a held job is considered crashed
+TEMPLATE_FIELDS = ('username', 'full_name', 'email')
+
+jobs = BulkEmailJob.__table__
+users = User.__table__
+
+def render(template, recipient, content_type='html'):
+    """Fill ``$username``, ``$full_name`` and ``$email``; unknown placeholders are left as-is"""
+    values = {field: recipient.get(field) or '' for field in TEMPLATE_FIELDS}
+    if content_type == 'html':
+        values = {field: html.escape(value) for field, value in values.items()}
+    return Template(template).safe_substitute(values)
+
+def _recipient_filter(user_type):
+    criteria = [users.c.is_active.is_(True), users.c.email.isnot(None)]
+    if user_type:
+        criteria.append(users.c.user_type == user_type)
+    return criteria
+
+def iter_recipient_chunks(engine, user_type=None, after_id=0, chunk_size=CHUNK_SIZE):
+    """Yield lists of recipient dicts in id order from a server-side cursor"""
+    query = select(users.c.id, *[users.c[field] for field in TEMPLATE_FIELDS]).where(
+        *_recipient_filter(user_type), users.c.id > after_id
+    ).order_by(users.c.id)
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.mappings().partitions(chunk_size):
+            yield [dict(row) for row in partition]
+
+def create_job(engine, subject, body_template, user_type=None, content_type='html', created_by=None):
+    """Record a pending bulk email job; returns its id"""
+    with engine.begin() as connection:
+        total = connection.execute(
+            select(func.count()).select_from(users).where(*_recipient_filter(user_type))
+        ).scalar()
+        return connection.execute(insert(jobs).values(
+            subject=subject, body_template=body_template, content_type=content_type, user_type=user_type,
+            status='pending', total_recipients=total, last_user_id=0, sent_count=0, failed_count=0,
+            retried_count=0, send_seconds=0, created_by=created_by, created_at=datetime.utcnow(),
+        )).inserted_primary_key[0]
+
+def set_job_status(engine, job_id, status):
+    """Pause, resume (back to 'pending') or cancel a job that has not finished
+
+    Only the status changes: a runner still holding the job notices at its
+    next checkpoint, and carries on if the job was resumed meanwhile.
+    """
+    with engine.begin() as connection:
+        return connection.execute(
+            update(jobs).where(jobs.c.id == job_id, jobs.c.status.in_(('pending', 'running', 'paused')))
+            .values(status=status)
+        ).rowcount == 1
+
+def _claimable(now):
+    """Jobs no live runner holds: released ones, or ones whose runner stopped heartbeating"""
+    stale = jobs.c.updated_at < now - timedelta(seconds=STALE_AFTER)
+    return jobs.c.status.in_(('pending', 'running')) & (jobs.c.runner_token.is_(None) | stale)
+
+def job_progress(job):
+    """Progress fields for a job row (mapping), including sends per second"""
+    done = (job['sent_count'] or 0) + (job['failed_count'] or 0) + (job['retried_count'] or 0)
+    total = job['total_recipients'] or 0
+    seconds = job['send_seconds'] or 0
+    return {
+        'done': done,
+        'total': total,
+        'fraction': min(1.0, done / total) if total else 1.0,
+        'per_second': (job['sent_count'] or 0) / seconds if seconds else 0.0,
+    }
+
+def list_jobs(engine, limit=20):
+    with engine.connect() as connection:
+        rows = connection.execute(select(jobs).order_by(jobs.c.id.desc()).limit(limit)).mappings().all()
+    return [{**row, **job_progress(row)} for row in rows]
+
+class BulkEmailSender:
+    """Sends one job's messages over a small pool of reused SMTP connections
+
+    Recipients are streamed in id order ``chunk_size`` at a time. Each chunk
+    is rendered and sent by ``connections`` threads, each holding its own
+    authenticated session, with all of them sharing one rate limiter. After
+    every chunk the job row is checkpointed (last user id, counters, send
+    time), which is also where pause/cancel requests are noticed; a job
+    resumed before the runner saw the pause simply carries on. The runner
+    holds the job under a ``runner_token`` and refreshes ``updated_at``
+    every HEARTBEAT_INTERVAL seconds, even mid-chunk, so only a runner that
+    has really stopped is taken over (after STALE_AFTER). A crashed job
+    resumes from its last checkpoint, so at most one chunk is resent.
+    Transient failures are handed to the email outbox for retry with backoff;
+    permanent ones are counted as failed.
+    """
+
+    def __init__(self, engine, config=None, connections=CONNECTIONS, rate=None, chunk_size=CHUNK_SIZE,
+                 heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.engine = engine
+        self.config = config or smtp_config()
+        self.connections = connections
+        self.chunk_size = chunk_size
+        self.heartbeat_interval = heartbeat_interval
+        self.limiter = RateLimiter(rate if rate is not None else self.config.get('rate'))
+        self.token = secrets.token_hex(16)
+
+    def _mine(self, job_id):
+        return (jobs.c.id == job_id) & (jobs.c.runner_token == self.token)
+
+    def _claim(self, job_id):
+        """Take the job if it is pending or its previous runner went quiet"""
+        now = datetime.utcnow()
+        with self.engine.begin() as connection:
+            claimed = connection.execute(
+                update(jobs).where(jobs.c.id == job_id, _claimable(now)).values(
+                    status='running', runner_token=self.token, updated_at=now,
+                    started_at=func.coalesce(jobs.c.started_at, now),
+                )
+            ).rowcount
+            if not claimed:
+                return None
+            return connection.execute(select(jobs).where(jobs.c.id == job_id)).mappings().first()
+
+    def _heartbeat(self, job_id, stop):
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(update(jobs).where(self._mine(job_id)).values(updated_at=datetime.utcnow()))
+            except Exception:
+                pass  # the next beat or checkpoint tries again
+
+    def _send_chunk(self, pool, idle, job, chunk):
+        def send(recipient):
+            subject = render(job['subject'], recipient, 'plain')
+            body = render(job['body_template'], recipient, job['content_type'])
+            self.limiter.acquire()
+            connection = idle.get()
+            try:
+                connection.send(build_message(self.config['sender'], recipient['email'], subject, body,
+                                              job['content_type']))
+                return 'sent', None
+            except Exception as e:
+                if not keeps_session(e):
+                    connection.close()
+                if is_permanent_failure(e):
+                    return 'failed', str(e)
+                enqueue_email(self.engine, recipient['email'], subject, body, job['content_type'],
+                              start_worker=False)
+                return 'retry', str(e)
+            finally:
+                idle.put(connection)
+
+        counts = {'sent': 0, 'failed': 0, 'retry': 0}
+        last_error = None
+        for outcome, error in pool.map(send, chunk):
+            counts[outcome] += 1
+            last_error = error or last_error
+        return counts, last_error
+
+    def _checkpoint(self, job_id, last_user_id, counts, seconds, last_error):
+        """Record a finished chunk; returns the job's status, or None if the job was taken over"""
+        values = dict(
+            last_user_id=last_user_id,
+            sent_count=jobs.c.sent_count + counts['sent'],
+            failed_count=jobs.c.failed_count + counts['failed'],
+            retried_count=jobs.c.retried_count + counts['retry'],
+            send_seconds=jobs.c.send_seconds + seconds,
+            updated_at=datetime.utcnow(),
+        )
+        if last_error:
+            values['last_error'] = last_error
+        with self.engine.begin() as connection:
+            if not connection.execute(update(jobs).where(self._mine(job_id)).values(**values)).rowcount:
+                return None
+            # Paused and resumed again before this checkpoint: keep going
+            connection.execute(
+                update(jobs).where(self._mine(job_id), jobs.c.status == 'pending').values(status='running')
+            )
+            return connection.execute(select(jobs.c.status).where(jobs.c.id == job_id)).scalar()
+
+    def _release(self, job_id, status=None, error=None):
+        """Give the job up; ``status`` is set only if it is still running (not paused/cancelled meanwhile)"""
+        now = datetime.utcnow()
+        with self.engine.begin() as connection:
+            if status:
+                values = dict(status=status, finished_at=now)
+                if error:
+                    values['last_error'] = error
+                connection.execute(update(jobs).where(self._mine(job_id), jobs.c.status == 'running').values(**values))
+            connection.execute(update(jobs).where(self._mine(job_id)).values(runner_token=None, updated_at=now))
+
+    def run(self, job_id):
+        """Send (or resume) a job; returns its final status, or None if another runner holds it"""
+        job = self._claim(job_id)
+        if job is None:
+            return None
+        idle = queue.Queue()
+        for _ in range(self.connections):
+            idle.put(SMTPConnection(self.config))
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, stop_heartbeat),
+                                     name=f'bulk-email-{job_id}-heartbeat', daemon=True)
+        heartbeat.start()
+        status = 'completed'
+        try:
+            with ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix='bulk-email') as pool:
+                for chunk in iter_recipient_chunks(self.engine, job['user_type'], job['last_user_id'] or 0,
+                                                   self.chunk_size):
+                    started = time.monotonic()
+                    counts, last_error = self._send_chunk(pool, idle, job, chunk)
+                    status = self._checkpoint(job_id, chunk[-1]['id'], counts, time.monotonic() - started,
+                                              last_error)
+                    if status != 'running':
+                        break  # paused or cancelled from the admin tab, or taken over
+                else:
+                    status = 'completed'
+        except Exception as e:
+            status = 'failed'
+            self._release(job_id, 'failed', str(e)[:1000])
+        else:
+            if status is not None:
+                self._release(job_id, 'completed' if status == 'completed' else None)
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+            while not idle.empty():
+                idle.get().close()
+            start_outbox_worker(self.engine).wake()  # delivers transient failures queued above
+        return status
+
+_runners = {}
+_runners_lock = threading.Lock()
+
+def _run_job(engine, job_id, options):
+    sender = BulkEmailSender(engine, **options)
+    while True:
+        sender.run(job_id)
+        with _runners_lock:
+            # Resumed after this runner saw the pause but before it let go: run again
+            with engine.connect() as connection:
+                status = connection.execute(select(jobs.c.status).where(jobs.c.id == job_id)).scalar()
+            if status != 'pending':
+                _runners.pop(job_id, None)
+                return
+
+def start_job(engine, job_id, **options):
+    """Run a job in a background thread (one thread per job per process)
+
+    If this process's runner is still winding down it picks a resumed job
+    up itself, so no second thread is started.
+    """
+    with _runners_lock:
+        thread = _runners.get(job_id)
+        if thread is not None and thread.is_alive():
+            return thread
+        thread = threading.Thread(target=_run_job, args=(engine, job_id, options),
+                                  name=f'bulk-email-{job_id}', daemon=True)
+        _runners[job_id] = thread
+        thread.start()
+        return thread
+
+def resume_jobs(engine, **options):
+    """Restart pending jobs and ones whose runner crashed; returns their ids"""
+    with engine.connect() as connection:
+        job_ids = connection.execute(
+            select(jobs.c.id).where(_claimable(datetime.utcnow())).order_by(jobs.c.id)
+        ).scalars().all()
+    for job_id in job_ids:
+        start_job(engine, job_id, **options)
+    return job_ids
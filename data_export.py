@@ -0,0 +1,158 @@
+import csv
+import io
+import zlib
+from sqlalchemy import select, Integer, Boolean, DateTime, Date, Float
+from database import PrayerRequest, apply_prayer_filters
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+def iter_prayer_chunks(engine, filters=None, chunk_size=5000):
+    """Yield lists of row dicts from a server-side cursor"""
+    table = PrayerRequest.__table__
+    query = apply_prayer_filters(select(table), filters).order_by(table.c.id)
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.mappings().partitions(chunk_size):
+            yield [dict(row) for row in partition]
+
+def compressor_for(compression):
+    """Return a streaming compressor with compress()/flush(), or None"""
+    if not compression:
+        return None
+    if compression == 'gzip':
+        return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unsupported compression: {compression}")
+
+def _iter_csv(chunks, columns, compression, stats):
+    """Encode row chunks as (optionally compressed) CSV byte blocks"""
+    compressor = compressor_for(compression)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    for rows in chunks:
+        writer.writerows(rows)
+        stats['rows'] += len(rows)
+        data = drain()
+        if data:
+            yield data
+
+    data = drain()
+    if compressor:
+        data += compressor.flush()
+    if data:
+        yield data
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back in blocks"""
+
+    def __init__(self):
+        self.closed = False
+        self._blocks = []
+        self._position = 0
+
+    def write(self, data):
+        self._blocks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self._blocks)
+        self._blocks = []
+        return data
+
+def parquet_schema(pa, table):
+    """Arrow schema mirroring the SQLAlchemy column types"""
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp('us')
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+def _iter_parquet(chunks, table, compression, stats):
+    """Encode row chunks as Parquet, one row group per chunk"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export requires the 'pyarrow' package")
+
+    schema = parquet_schema(pa, table)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression or 'snappy')
+    try:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            stats['rows'] += len(rows)
+            data = sink.take()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.take()
+    if data:
+        yield data
+
+def iter_export(engine, fmt='csv', filters=None, compression=None, chunk_size=5000, stats=None):
+    """Generator of export file bytes; memory is bounded by ``chunk_size``"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    stats = stats if stats is not None else {'rows': 0}
+    chunks = iter_prayer_chunks(engine, filters, chunk_size)
+    table = PrayerRequest.__table__
+    if fmt == 'csv':
+        return _iter_csv(chunks, [column.name for column in table.columns], compression, stats)
+    # Parquet compresses per column chunk; the codec goes to the writer
+    return _iter_parquet(chunks, table, compression, stats)
+
+def export_prayer_requests(engine, dest=None, fmt='csv', filters=None, compression=None, chunk_size=5000):
+    """Export prayer requests as CSV or Parquet
+
+    With ``dest=None`` returns a generator of byte blocks (e.g. for a
+    streaming HTTP response); otherwise writes to the file path ``dest``.
+    Filters are the same as ``DatabaseManager.get_prayer_requests``.
+    """
+    stats = {'rows': 0}
+    try:
+        blocks = iter_export(engine, fmt, filters, compression, chunk_size, stats)
+        if dest is None:
+            return {'success': True, 'stream': blocks, 'stats': stats}
+
+        with open(dest, 'wb') as output:
+            for block in blocks:
+                output.write(block)
+        return {'success': True, 'path': dest, 'rows': stats['rows']}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
@@ -1,15 +1,25 @@
-```python
-import psycopg2
-import mysql.connector
-import pandas as pd
-import streamlit as st
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, Float
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Date, Boolean, Float, Index, tuple_, update, func, insert, select, case, delete, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.pool import StaticPool
+from sqlalchemy import event, DDL, union_all, inspect
+from sqlalchemy.schema import CreateIndex
+from datetime import datetime, date
 import json
+import logging
+import os
+import query_stats
+import tempfile
+import threading
+import atexit
+import time
+import itertools
+import weakref
+from collections import Counter, OrderedDict
 
 Base = declarative_base()
+logger = logging.getLogger('vakyadharam.db')
 
 # SQLAlchemy Models
 class User(Base):
@@ -30,6 +40,12 @@ class User(Base):
     prayer_count = Column(Integer, default=0)
     user_type = Column(String(20), default='user')  # user, admin, moderator
     notification_token = Column(Text)
+    
+    # Login looks users up case-insensitively; these also stop case-variant duplicates
+    __table_args__ = (
+        Index('uq_users_email_lower', func.lower(email), unique=True),
+        Index('uq_users_username_lower', func.lower(username), unique=True),
+    )
 
 class PrayerRequest(Base):
     __tablename__ = 'prayer_requests'
@@ -49,6 +65,44 @@ class PrayerRequest(Base):
     prayer_count = Column(Integer, default=0)  # how many people prayed
     tags = Column(String(500))  # JSON string of tags
     media_urls = Column(Text)  # JSON string of media URLs
+    
+    # Composite indexes matching the feed's filter + keyset ordering
+    __table_args__ = (
+        Index('ix_prayer_requests_created_id', 'created_at', 'id'),
+        Index('ix_prayer_requests_type_created_id', 'prayer_type', 'created_at', 'id'),
+        Index('ix_prayer_requests_status_created_id', 'status', 'created_at', 'id'),
+        Index('ix_prayer_requests_user_created_id', 'user_id', 'created_at', 'id'),
+    )
+
+class PrayerRequestArchive(Base):
+    """Answered prayer requests moved out of the hot table by archive.py
+    
+    Range-partitioned by month on ``created_at`` on PostgreSQL (hence the
+    composite key); a plain table elsewhere. Ids are kept from the source.
+    """
+    __tablename__ = 'prayer_requests_archive'
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer)
+    prayer_type = Column(String(50))
+    title = Column(String(200))
+    description = Column(Text)
+    urgency_level = Column(Integer)
+    is_anonymous = Column(Boolean, default=False)
+    status = Column(String(50))
+    answered_details = Column(Text)
+    answered_at = Column(DateTime)
+    created_at = Column(DateTime, primary_key=True)
+    updated_at = Column(DateTime)
+    prayer_count = Column(Integer, default=0)
+    tags = Column(String(500))
+    media_urls = Column(Text)
+    
+    __table_args__ = (
+        Index('ix_prayer_requests_archive_created_id', 'created_at', 'id'),
+        Index('ix_prayer_requests_archive_user_created_id', 'user_id', 'created_at', 'id'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
 
 class PrayerResponse(Base):
     __tablename__ = 'prayer_responses'
@@ -60,6 +114,36 @@ class PrayerResponse(Base):
     comment = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     is_anonymous = Column(Boolean, default=False)
+    
+    # Per-prayer timeline in keyset order; also covers the grouped counts
+    __table_args__ = (
+        Index('ix_prayer_responses_prayer_created_id', 'prayer_id', 'created_at', 'id'),
+    )
+
+class PrayerResponseArchive(Base):
+    """Responses of archived prayer requests (partitioned like PrayerRequestArchive)"""
+    __tablename__ = 'prayer_responses_archive'
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    prayer_id = Column(Integer)
+    user_id = Column(Integer)
+    response_type = Column(String(50))
+    comment = Column(Text)
+    created_at = Column(DateTime, primary_key=True)
+    is_anonymous = Column(Boolean, default=False)
+    
+    __table_args__ = (
+        Index('ix_prayer_responses_archive_prayer_created_id', 'prayer_id', 'created_at', 'id'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
+# Partitioned tables reject rows without a matching partition; a DEFAULT
+# partition catches whatever archive.py has not created a month for yet
+for _archive_table in (PrayerRequestArchive.__table__, PrayerResponseArchive.__table__):
+    event.listen(_archive_table, 'after_create', DDL(
+        f"CREATE TABLE IF NOT EXISTS {_archive_table.name}_default "
+        f"PARTITION OF {_archive_table.name} DEFAULT"
+    ).execute_if(dialect='postgresql'))
 
 class BlogPost(Base):
     __tablename__ = 'blog_posts'
@@ -87,39 +171,855 @@ class Notification(Base):
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     action_url = Column(String(500))
+    
+    __table_args__ = (
+        # Per-user inbox and unread badge
+        Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+        # Retention purge walks read rows oldest first
+        Index('ix_notifications_read_created_id', 'is_read', 'created_at', 'id'),
+    )
+
+class NotificationArchive(Base):
+    """Read notifications moved out by retention.py in archive mode"""
+    __tablename__ = 'notifications_archive'
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer)
+    title = Column(String(200))
+    message = Column(Text)
+    notification_type = Column(String(50))
+    is_read = Column(Boolean, default=True)
+    created_at = Column(DateTime)
+    action_url = Column(String(500))
+
+class PasswordResetToken(Base):
+    """Outstanding password reset link; only the SHA-256 of the token is stored"""
+    __tablename__ = 'password_reset_tokens'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, index=True)
+    token_hash = Column(String(64), unique=True)
+    expires_at = Column(DateTime)
+    used_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class OutboxEmail(Base):
+    """Queued outgoing email, drained by the email_outbox worker"""
+    __tablename__ = 'email_outbox'
+    
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String(200))
+    subject = Column(String(300))
+    body = Column(Text)
+    content_type = Column(String(20), default='html')  # html, plain
+    status = Column(String(20), default='pending')  # pending, sending, sent, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    claim_token = Column(String(32))
+    claimed_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('ix_email_outbox_status_next_id', 'status', 'next_attempt_at', 'id'),
+    )
+
+class BulkEmailJob(Base):
+    """An admin bulk mailing; last_user_id is the resume point for bulk_email"""
+    __tablename__ = 'bulk_email_jobs'
+
+    id = Column(Integer, primary_key=True)
+    subject = Column(String(300))
+    body_template = Column(Text)
+    content_type = Column(String(20), default='html')
+    user_type = Column(String(20))  # recipient filter, None for everyone
+    status = Column(String(20), default='pending')  # pending, running, paused, completed, cancelled, failed
+    runner_token = Column(String(32))  # the runner currently holding the job, None when released
+    total_recipients = Column(Integer, default=0)
+    last_user_id = Column(Integer, default=0)
+    sent_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    retried_count = Column(Integer, default=0)  # handed to the outbox after a transient failure
+    last_error = Column(Text)
+    created_by = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    updated_at = Column(DateTime)  # runner heartbeat
+    finished_at = Column(DateTime)
+    send_seconds = Column(Float, default=0)  # time spent sending, for throughput across resumes
+
+class Tag(Base):
+    __tablename__ = 'tags'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True)
+
+class EntityTag(Base):
+    """Normalized tag links; mirrors the JSON ``tags`` column of the entity"""
+    __tablename__ = 'entity_tags'
+    
+    tag_id = Column(Integer, primary_key=True)
+    entity_type = Column(String(20), primary_key=True)  # prayer, blog
+    entity_id = Column(Integer, primary_key=True)
+    
+    __table_args__ = (
+        Index('ix_entity_tags_entity', 'entity_type', 'entity_id'),
+    )
+
+class PrayerStatsRollup(Base):
+    """Per-day, per-type prayer totals maintained on insert/answer"""
+    __tablename__ = 'prayer_stats_rollup'
+    
+    day = Column(Date, primary_key=True)
+    prayer_type = Column(String(50), primary_key=True)
+    prayer_count = Column(Integer, default=0)
+    answered_count = Column(Integer, default=0)
+
+# Process-wide engine registry: one pooled engine per (db_type, DSN), shared
+# by every DatabaseManager instance and every Streamlit rerun/session.
+POOL_DEFAULTS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,  # seconds
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine(db_type, connection_string, bootstrap_schema=True, **pool_options):
+    """Return the shared engine for a DSN, creating it and the schema once"""
+    key = (db_type, connection_string)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+    
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            options = dict(POOL_DEFAULTS)
+            options.update(pool_options)
+            if db_type == 'sqlite':
+                options = _sqlite_engine_options(connection_string, options)
+            engine = create_engine(connection_string, **options)
+            if db_type == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_on_connect)
+            query_stats.SLOW_QUERY_MS = float(_secret('SLOW_QUERY_MS', query_stats.SLOW_QUERY_MS))
+            query_stats.instrument_engine(engine)
+            # One-time schema bootstrap per engine, not per connect()
+            if bootstrap_schema:
+                Base.metadata.create_all(engine)
+                ensure_indexes(engine)
+                from search import ensure_search_indexes
+                ensure_search_indexes(engine)
+            _engines[key] = engine
+    return engine
+
+def ensure_indexes(engine):
+    """Create declared indexes missing from tables that predate them
+
+    create_all() only creates indexes together with a new table, so indexes
+    added to an existing model would otherwise never reach production.
+    PostgreSQL builds them CONCURRENTLY (except on partitioned tables, which
+    do not support it). A unique index that existing rows violate is
+    skipped with a warning; merge the duplicates and restart.
+    """
+    dialect = engine.dialect.name
+    existing = None  # PostgreSQL and SQLite have CREATE INDEX IF NOT EXISTS
+    if dialect not in ('postgresql', 'sqlite'):
+        with engine.connect() as connection:
+            inspector = inspect(connection)
+            existing = {name: {index['name'] for index in inspector.get_indexes(name)}
+                        for name in inspector.get_table_names()}
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if existing is not None and index.name in existing.get(table.name, ()):
+                continue
+            ddl = str(CreateIndex(index, if_not_exists=existing is None).compile(dialect=engine.dialect))
+            if dialect == 'postgresql' and not table.dialect_options['postgresql'].get('partition_by'):
+                ddl = ddl.replace(' INDEX ', ' INDEX CONCURRENTLY ', 1)
+            try:
+                # Outside a transaction: required for CONCURRENTLY, one failure does not undo the rest
+                with engine.connect() as connection:
+                    connection.execution_options(isolation_level='AUTOCOMMIT').execute(text(ddl))
+            except Exception as e:
+                logger.warning("Could not create index %s on %s: %s", index.name, table.name, e)
+
+def _sqlite_engine_options(connection_string, options):
+    """In-memory databases need one shared connection; files keep the pool"""
+    if connection_string in ('sqlite://', 'sqlite:///:memory:'):
+        return {
+            'poolclass': StaticPool,
+            'connect_args': {'check_same_thread': False},
+        }
+    options['connect_args'] = {'check_same_thread': False}
+    return options
+
+def _sqlite_on_connect(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run alongside the single writer
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def dispose_engines():
+    """Close every pooled connection (for shutdown and tests)"""
+    for buffer in list(_counter_buffers.values()):
+        buffer.stop()
+    with _engines_lock:
+        _counter_buffers.clear()
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+_replica_lag_cache = weakref.WeakKeyDictionary()
+_replica_counters = {}  # replica DSNs -> round-robin counter shared by every DatabaseManager
+REPLICA_LAG_CHECK_INTERVAL = 5  # seconds
+
+def replica_lag(engine):
+    """Replication delay of a replica in seconds (cached briefly); 0 if unknown"""
+    checked = _replica_lag_cache.get(engine)
+    if checked and time.monotonic() - checked[0] < REPLICA_LAG_CHECK_INTERVAL:
+        return checked[1]
+    
+    lag = 0.0
+    try:
+        if engine.dialect.name == 'postgresql':
+            with engine.connect() as connection:
+                lag = connection.execute(text(
+                    "SELECT coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                )).scalar() or 0.0
+    except Exception:
+        lag = float('inf')  # unreachable replicas are skipped
+    _replica_lag_cache[engine] = (time.monotonic(), float(lag))
+    return float(lag)
+
+def _secret(key, default=None):
+    """Optional Streamlit secret; ``default`` when unset or no secrets file exists"""
+    try:
+        import streamlit as st
+        return st.secrets.get(key, default)
+    except Exception:
+        return default
+
+DRIVERS = {'postgresql': 'postgresql', 'mysql': 'mysql+mysqlconnector', 'sqlite': 'sqlite'}
+
+def database_url_for(db_type, sqlite_path=None, drivers=DRIVERS):
+    """Build the DSN for ``db_type`` from Streamlit secrets (or the SQLite path)"""
+    if db_type == 'sqlite':
+        sqlite_path = sqlite_path or _secret('SQLITE_PATH', 'vakyadharam.db')
+        return f"{drivers['sqlite']}://" if sqlite_path == ':memory:' else f"{drivers['sqlite']}:///{sqlite_path}"
+    import streamlit as st
+    return (
+        f"{drivers[db_type]}://{st.secrets['DB_USER']}:{st.secrets['DB_PASSWORD']}"
+        f"@{st.secrets['DB_HOST']}:{st.secrets['DB_PORT']}"
+        f"/{st.secrets['DB_NAME']}"
+    )
+
+def _pool_options_from_secrets():
+    """Read optional pool tuning from Streamlit secrets"""
+    options = {}
+    for key, option, cast in (
+        ('DB_POOL_SIZE', 'pool_size', int),
+        ('DB_MAX_OVERFLOW', 'max_overflow', int),
+        ('DB_POOL_RECYCLE', 'pool_recycle', int),
+        ('DB_POOL_PRE_PING', 'pool_pre_ping', lambda v: str(v).lower() in ('1', 'true', 'yes')),
+    ):
+        value = _secret(key)
+        if value is not None:
+            options[option] = cast(value)
+    return options
+
+RESPONSE_TYPES = ('prayed', 'comment', 'amen')
+
+# Derived counters: name -> (model, counter column, timestamp column to touch)
+COUNTERS = {
+    'prayer_count': (PrayerRequest, 'prayer_count', 'updated_at'),
+    'user_prayer_count': (User, 'prayer_count', None),
+    'view_count': (BlogPost, 'view_count', 'updated_at'),  # so incremental backups pick views up
+}
+
+def counter_update(counter, row_ids, amount=1):
+    """Build a server-side ``SET x = x + n`` UPDATE for one or more rows"""
+    model, column_name, touch_column = COUNTERS[counter]
+    column = getattr(model, column_name)
+    values = {column_name: func.coalesce(column, 0) + amount}
+    if touch_column:
+        values[touch_column] = datetime.utcnow()
+    if isinstance(row_ids, (list, tuple, set)):
+        condition = model.id.in_(list(row_ids))
+    else:
+        condition = model.id == row_ids
+    return update(model).where(condition).values(**values)
+
+class CounterBuffer:
+    """Atomic counter increments, optionally buffered and flushed in batches
+    
+    With ``flush_interval=None`` every increment is applied immediately as an
+    UPDATE. Otherwise increments are coalesced in memory per (counter, row)
+    and a background thread flushes them every ``flush_interval`` seconds,
+    issuing one UPDATE per counter and distinct delta.
+    """
+    
+    def __init__(self, engine, flush_interval=None):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if flush_interval:
+            self._thread = threading.Thread(target=self._run, name='counter-flush', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+    
+    @property
+    def buffered(self):
+        return self._thread is not None
+    
+    def increment(self, counter, row_id, amount=1, session=None):
+        """Add ``amount`` to a counter; joins ``session``'s transaction if unbuffered"""
+        if counter not in COUNTERS:
+            raise KeyError(f"Unknown counter: {counter}")
+        if not row_id or not amount:
+            return
+        
+        if self.buffered:
+            with self._lock:
+                key = (counter, row_id)
+                self._pending[key] = self._pending.get(key, 0) + amount
+            return
+        
+        statement = counter_update(counter, row_id, amount)
+        if session is not None:
+            session.execute(statement)
+        else:
+            with self.engine.begin() as connection:
+                connection.execute(statement)
+    
+    def flush(self):
+        """Write all pending deltas; returns the number of rows touched"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        
+        # Group rows sharing the same counter and delta into one UPDATE
+        batches = {}
+        for (counter, row_id), amount in pending.items():
+            if amount:
+                batches.setdefault((counter, amount), []).append(row_id)
+        
+        try:
+            with self.engine.begin() as connection:
+                for (counter, amount), row_ids in batches.items():
+                    connection.execute(counter_update(counter, row_ids, amount))
+        except Exception:
+            # Put the deltas back so the next flush retries them
+            with self._lock:
+                for key, amount in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + amount
+            raise
+        return len(pending)
+    
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                pass
+    
+    def stop(self):
+        """Stop the flush thread and write out anything still pending"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+
+_counter_buffers = {}
+
+def get_counter_buffer(engine, flush_interval=None):
+    """Return the process-wide counter buffer for an engine"""
+    key = (id(engine), flush_interval)
+    with _engines_lock:
+        buffer = _counter_buffers.get(key)
+        if buffer is None:
+            buffer = CounterBuffer(engine, flush_interval)
+            _counter_buffers[key] = buffer
+    return buffer
+
+def chunked(iterable, size):
+    """Yield lists of up to ``size`` items without materializing the input"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _apply_counter_deltas(session, counter, row_ids):
+    """Apply per-row counts as one UPDATE per distinct delta"""
+    by_delta = {}
+    for row_id, amount in Counter(i for i in row_ids if i).items():
+        by_delta.setdefault(amount, []).append(row_id)
+    for amount, ids in by_delta.items():
+        session.execute(counter_update(counter, ids, amount))
+
+def _bump_rollup(session, day, prayer_type, prayers=0, answered=0):
+    """Add to one rollup cell, creating it on first use"""
+    prayer_type = prayer_type or ''
+    values = {
+        'prayer_count': PrayerStatsRollup.prayer_count + prayers,
+        'answered_count': PrayerStatsRollup.answered_count + answered,
+    }
+    statement = update(PrayerStatsRollup).where(
+        PrayerStatsRollup.day == day,
+        PrayerStatsRollup.prayer_type == prayer_type
+    ).values(**values)
+    if session.execute(statement).rowcount:
+        return
+    try:
+        with session.begin_nested():
+            session.execute(insert(PrayerStatsRollup).values(
+                day=day, prayer_type=prayer_type, prayer_count=prayers, answered_count=answered
+            ))
+    except IntegrityError:
+        # Another writer created the cell first
+        session.execute(statement)
+
+class StatsCache:
+    """Process-wide TTL cache with single-flight recomputation
+    
+    Only one caller recomputes an expired entry; concurrent callers get the
+    previous value while it refreshes (or wait if there is none yet).
+    """
+    
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+    
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+    
+    def get(self, key, compute):
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        
+        lock = self._lock_for(key)
+        if entry and not lock.acquire(blocking=False):
+            return entry[1]  # someone else is refreshing; serve stale
+        if not entry:
+            lock.acquire()
+        try:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            value = compute()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+        finally:
+            lock.release()
+    
+    def invalidate(self, key=None):
+        with self._guard:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+stats_cache = StatsCache()
+
+ANONYMOUS_AUTHOR = {'user_id': None, 'name': 'Anonymous', 'avatar': None}
+
+class UserRecordCache:
+    """Per-process LRU of small per-user records by user id
+    
+    Entries expire after ``ttl`` seconds so profile edits made by other
+    processes show up eventually; update_user_profile invalidates locally.
+    """
+    
+    def __init__(self, maxsize=2048, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_many(self, user_ids):
+        """Cached records for ``user_ids`` and the ids that must be loaded"""
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry and entry[0] > now:
+                    self._entries.move_to_end(user_id)
+                    found[user_id] = entry[1]
+                else:
+                    missing.append(user_id)
+        return found, missing
+    
+    def put_many(self, records):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for user_id, record in records.items():
+                self._entries[user_id] = (expires, record)
+                self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+user_display_cache = UserRecordCache()  # feed authors: name, avatar
+user_profile_cache = UserRecordCache(maxsize=1024, ttl=60)  # sidebar and profile tab
+
+def author_records(session, authors):
+    """Display records for (user_id, is_anonymous) pairs, loading cache misses in one IN query"""
+    user_ids = list({user_id for user_id, is_anonymous in authors if user_id and not is_anonymous})
+    records, missing = user_display_cache.get_many(user_ids)
+    if missing:
+        loaded = {
+            row.id: {'user_id': row.id, 'name': row.full_name or row.username, 'avatar': row.profile_pic}
+            for row in session.execute(
+                select(User.id, User.username, User.full_name, User.profile_pic).where(User.id.in_(missing))
+            )
+        }
+        user_display_cache.put_many(loaded)
+        records.update(loaded)
+    return [
+        ANONYMOUS_AUTHOR if is_anonymous or user_id not in records else records[user_id]
+        for user_id, is_anonymous in authors
+    ]
+
+def attach_authors(session, result):
+    """Add an ``author`` field to a feed result (rows or columnar) and hide anonymous user ids"""
+    data = result['data']
+    if isinstance(data, list):
+        for row, author in zip(data, author_records(session, [(r['user_id'], r['is_anonymous']) for r in data])):
+            row['author'] = dict(author)
+            if row['is_anonymous']:
+                row['user_id'] = None
+        return result
+    
+    authors = author_records(session, list(zip(data['user_id'], data['is_anonymous'])))
+    anonymous = list(data['is_anonymous'])
+    data['author'] = [dict(author) for author in authors]
+    data['user_id'] = [None if hidden else user_id for user_id, hidden in zip(data['user_id'], anonymous)]
+    return result
+
+def _normalize_tags(tags):
+    """Strip, drop empties and de-duplicate while keeping order"""
+    seen = {}
+    for tag in tags or []:
+        tag = str(tag).strip()
+        if tag and tag not in seen:
+            seen[tag] = True
+    return list(seen)
+
+def _resolve_tag_ids(session, names):
+    """Map tag names to ids, creating missing tags"""
+    if not names:
+        return {}
+    tag_ids = dict(session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    for name in names:
+        if name in tag_ids:
+            continue
+        try:
+            with session.begin_nested():
+                tag_ids[name] = session.execute(insert(Tag).values(name=name)).inserted_primary_key[0]
+        except IntegrityError:
+            # Created concurrently by another writer
+            tag_ids[name] = session.execute(select(Tag.id).where(Tag.name == name)).scalar()
+    return tag_ids
+
+def sync_entity_tags(session, entity_type, tags_by_entity, replace=True):
+    """Write tag links for ``{entity_id: [tag, ...]}`` in set-based statements"""
+    tags_by_entity = {entity_id: _normalize_tags(tags) for entity_id, tags in tags_by_entity.items()}
+    if replace and tags_by_entity:
+        session.execute(delete(EntityTag).where(
+            EntityTag.entity_type == entity_type,
+            EntityTag.entity_id.in_(list(tags_by_entity))
+        ))
+    
+    all_names = _normalize_tags(name for tags in tags_by_entity.values() for name in tags)
+    tag_ids = _resolve_tag_ids(session, all_names)
+    links = [
+        {'tag_id': tag_ids[name], 'entity_type': entity_type, 'entity_id': entity_id}
+        for entity_id, tags in tags_by_entity.items()
+        for name in tags
+    ]
+    if links:
+        session.execute(insert(EntityTag), links)
+
+def tagged_entity_ids(entity_type, tags, match='any'):
+    """Subquery of entity ids carrying any (or all) of ``tags``"""
+    tags = _normalize_tags(tags)
+    query = (
+        select(EntityTag.entity_id)
+        .join(Tag, Tag.id == EntityTag.tag_id)
+        .where(EntityTag.entity_type == entity_type, Tag.name.in_(tags))
+    )
+    if match == 'all':
+        query = query.group_by(EntityTag.entity_id).having(func.count() == len(tags))
+    return query
+
+def apply_prayer_filters(query, filters, table=None):
+    """Apply the standard prayer request filters to an ORM query or Core select
+    
+    ``table`` defaults to prayer_requests; pass the archive table to filter
+    a SELECT over it.
+    """
+    c = (table if table is not None else PrayerRequest.__table__).c
+    if filters:
+        if filters.get('prayer_type'):
+            query = query.filter(c.prayer_type == filters['prayer_type'])
+        if filters.get('user_id'):
+            query = query.filter(c.user_id == filters['user_id'])
+        if filters.get('status'):
+            query = query.filter(c.status == filters['status'])
+        if filters.get('date_from'):
+            query = query.filter(c.created_at >= filters['date_from'])
+        if filters.get('date_to'):
+            query = query.filter(c.created_at <= filters['date_to'])
+        if filters.get('tags'):
+            query = query.filter(c.id.in_(
+                tagged_entity_ids('prayer', filters['tags'], filters.get('tags_match', 'any'))
+            ))
+    return query
+
+def encode_cursor(created_at, row_id):
+    """Encode a (created_at, id) keyset position as an opaque token"""
+    return f"{created_at.isoformat()}|{row_id}"
+
+def decode_cursor(cursor):
+    """Decode a cursor token (or pass through a (created_at, id) tuple)"""
+    if isinstance(cursor, (tuple, list)):
+        created_at, row_id = cursor
+    else:
+        created_at, row_id = cursor.rsplit('|', 1)
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return created_at, int(row_id)
+
+def build_feed_query(filters=None, limit=50, after=None, columns=None, include_archive=False):
+    """Keyset-paginated feed SELECT; returns (query, output names, selected names)
+    
+    With ``include_archive`` the archive table is merged in: each side is
+    filtered and limited on its own indexes, then the union is ordered.
+    """
+    names = list(columns) if columns else [c.name for c in PrayerRequest.__table__.columns]
+    # id and created_at are always fetched for the cursor
+    selected = names + [n for n in ('created_at', 'id') if n not in names]
+    
+    def page(table):
+        query = apply_prayer_filters(select(*[table.c[n] for n in selected]), filters, table)
+        if after:
+            cursor_created_at, cursor_id = decode_cursor(after)
+            query = query.filter(
+                tuple_(table.c.created_at, table.c.id) < tuple_(cursor_created_at, cursor_id)
+            )
+        # Fetch one extra row to know whether another page exists
+        return query.order_by(table.c.created_at.desc(), table.c.id.desc()).limit(limit + 1)
+    
+    if not include_archive:
+        return page(PrayerRequest.__table__), names, selected
+    
+    merged = union_all(
+        page(PrayerRequest.__table__).subquery().select(),
+        page(PrayerRequestArchive.__table__).subquery().select(),
+    ).subquery()
+    query = select(*[merged.c[n] for n in selected])
+    return query.order_by(merged.c.created_at.desc(), merged.c.id.desc()).limit(limit + 1), names, selected
+
+def materialize_feed(rows, names, selected, limit, columnar=None, decode_json=True):
+    """Turn feed rows into the get_prayer_requests() result dict"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[selected.index('created_at')], last[selected.index('id')])
+    
+    json_positions = []
+    if decode_json:
+        json_positions = [i for i, n in enumerate(names) if n in ('tags', 'media_urls')]
+    width = len(names)
+    
+    if columnar:
+        # Transpose straight from the row tuples
+        data = {n: [] for n in names}
+        if rows:
+            # Extra cursor columns come last, so zip() drops them
+            data = dict(zip(names, (list(values) for values in zip(*rows))))
+        for i in json_positions:
+            data[names[i]] = [json.loads(v) if v else v for v in data[names[i]]]
+        if columnar == 'dataframe':
+            import pandas as pd
+            data = pd.DataFrame(data, columns=names)
+        return {'success': True, 'data': data, 'count': len(rows), 'next_cursor': next_cursor}
+    
+    # Convert to list of dictionaries
+    result = []
+    for row in rows:
+        prayer_dict = dict(zip(names, row[:width]))
+        
+        # Parse JSON fields
+        for i in json_positions:
+            if row[i]:
+                prayer_dict[names[i]] = json.loads(row[i])
+        
+        result.append(prayer_dict)
+    
+    return {'success': True, 'data': result, 'count': len(result), 'next_cursor': next_cursor}
+
+def prayer_history(*names):
+    """The named columns over live and archived prayer requests (UNION ALL)"""
+    return union_all(
+        select(*[PrayerRequest.__table__.c[n] for n in names]),
+        select(*[PrayerRequestArchive.__table__.c[n] for n in names]),
+    ).subquery()
+
+def build_dashboard_stats_query(use_rollup=False):
+    """Per-type (total, answered, today) counts plus the user count, in one SELECT"""
+    today = datetime.utcnow().date()
+    total_users = select(func.count()).select_from(User).scalar_subquery()
+    if use_rollup:
+        return select(
+            PrayerStatsRollup.prayer_type,
+            func.sum(PrayerStatsRollup.prayer_count),
+            func.sum(PrayerStatsRollup.answered_count),
+            func.sum(case((PrayerStatsRollup.day == today, PrayerStatsRollup.prayer_count), else_=0)),
+            total_users,
+        ).group_by(PrayerStatsRollup.prayer_type)
+    # Archived prayers still count towards the totals
+    prayers = prayer_history('prayer_type', 'status', 'created_at')
+    return select(
+        prayers.c.prayer_type,
+        func.count(),
+        func.sum(case((prayers.c.status == 'answered', 1), else_=0)),
+        func.sum(case((prayers.c.created_at >= datetime.combine(today, datetime.min.time()), 1), else_=0)),
+        total_users,
+    ).group_by(prayers.c.prayer_type)
+
+def summarize_dashboard_stats(rows, total_users):
+    """Fold the per-type rows into the dashboard stats dict"""
+    total_prayers = sum(int(row[1] or 0) for row in rows)
+    answered_prayers = sum(int(row[2] or 0) for row in rows)
+    return {
+        'total_prayers': total_prayers,
+        'answered_prayers': answered_prayers,
+        'answer_rate': (answered_prayers / total_prayers * 100) if total_prayers > 0 else 0,
+        'total_users': total_users,
+        'today_prayers': sum(int(row[3] or 0) for row in rows),
+        'prayer_types': {(row[0] or None): int(row[1] or 0) for row in rows if row[1]}
+    }
 
 class DatabaseManager:
-    def __init__(self, db_type='postgresql'):
+    def __init__(self, db_type='postgresql', counter_flush_interval=None, use_stats_rollup=False,
+                 replica_dsns=None, replica_strategy='round_robin', max_replica_lag=5,
+                 read_your_writes=5, state=None, database_url=None, sqlite_path=None, **pool_options):
         self.db_type = db_type
+        self.database_url = database_url  # explicit DSN; skips the secrets lookup
+        self.sqlite_path = sqlite_path  # file path or ':memory:' for db_type='sqlite'
+        self.counter_flush_interval = counter_flush_interval
+        self.use_stats_rollup = use_stats_rollup  # read stats from the rollup (every manager maintains it)
+        self.replica_dsns = replica_dsns
+        self.replica_strategy = replica_strategy  # round_robin, least_connections
+        self.max_replica_lag = max_replica_lag  # seconds
+        self.read_your_writes = read_your_writes  # seconds reads stay on primary after a write
+        # Where the last write time is kept; pass st.session_state to scope it to a user session
+        self.state = state if state is not None else {}
+        self.pool_options = pool_options
         self.engine = None
         self.Session = None
+        self.counters = None
+        self.replica_engines = []
+        self._replica_sessions = {}
+        self._round_robin = None
         
-    def connect(self):
+    def connect(self, announce=True):
         """Connect to database using Streamlit secrets"""
         try:
-            if self.db_type == 'postgresql':
-                connection_string = (
-                    f"postgresql://{st.secrets['DB_USER']}:{st.secrets['DB_PASSWORD']}"
-                    f"@{st.secrets['DB_HOST']}:{st.secrets['DB_PORT']}"
-                    f"/{st.secrets['DB_NAME']}"
-                )
-            else:  # mysql
-                connection_string = (
-                    f"mysql+mysqlconnector://{st.secrets['DB_USER']}:{st.secrets['DB_PASSWORD']}"
-                    f"@{st.secrets['DB_HOST']}:{st.secrets['DB_PORT']}"
-                    f"/{st.secrets['DB_NAME']}"
-                )
+            connection_string = self.database_url or database_url_for(self.db_type, self.sqlite_path)
             
-            self.engine = create_engine(connection_string)
+            pool_options = {} if self.db_type == 'sqlite' else _pool_options_from_secrets()
+            pool_options.update(self.pool_options)
+            self.engine = get_engine(self.db_type, connection_string, **pool_options)
             self.Session = sessionmaker(bind=self.engine)
-            Base.metadata.create_all(self.engine)
+            self.counters = get_counter_buffer(self.engine, self.counter_flush_interval)
+            
+            replica_dsns = self.replica_dsns
+            if replica_dsns is None:
+                replica_dsns = _secret('DB_REPLICA_URLS', [])
+            # Replicas are read-only: never run DDL against them
+            self.replica_engines = [
+                get_engine(self.db_type, dsn, bootstrap_schema=False, **pool_options)
+                for dsn in replica_dsns
+            ]
+            self._replica_sessions = {id(e): sessionmaker(bind=e) for e in self.replica_engines}
+            # Process-wide, so managers built on every rerun still spread reads across replicas
+            self._round_robin = _replica_counters.setdefault(tuple(replica_dsns), itertools.count())
             
-            st.success("✅ Database connected successfully!")
+            if announce:
+                import streamlit as st
+                st.success("✅ Database connected successfully!")
             return True
         except Exception as e:
-            st.error(f"Database connection failed: {str(e)}")
+            if announce:
+                import streamlit as st
+                st.error(f"Database connection failed: {str(e)}")
             return False
     
+    def _mark_write(self):
+        """Remember the write so this session's next reads go to the primary"""
+        self.state['_db_last_write'] = time.monotonic()
+    
+    def read_engine(self):
+        """Engine for a read-only query: a fresh-enough replica, else the primary"""
+        if not self.replica_engines:
+            return self.engine
+        last_write = self.state.get('_db_last_write')
+        if last_write is not None and time.monotonic() - last_write < self.read_your_writes:
+            return self.engine
+        
+        candidates = [e for e in self.replica_engines if replica_lag(e) <= self.max_replica_lag]
+        if not candidates:
+            return self.engine
+        if self.replica_strategy == 'least_connections':
+            return min(candidates, key=lambda e: e.pool.checkedout() if hasattr(e.pool, 'checkedout') else 0)
+        return candidates[next(self._round_robin) % len(candidates)]
+    
+    def read_session(self):
+        """ORM session for read-only work, routed by ``read_engine()``"""
+        engine = self.read_engine()
+        if engine is self.engine:
+            return self.Session()
+        return self._replica_sessions[id(engine)]()
+    
+    def _feed_event(self, action, *args):
+        """Forward a committed write to the hot-feed ranking, if one is loaded"""
+        from ranking import loaded_feed
+        feed = loaded_feed(self.engine)
+        if feed is not None:
+            getattr(feed, action)(*args)
+    
+    def _insert_chunk(self, session, model, rows):
+        """Multi-row INSERT of one chunk, returning the generated ids"""
+        if self.engine.dialect.insert_executemany_returning:
+            result = session.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+            return [row[0] for row in result]
+        # No RETURNING with executemany (MySQL): insert row by row, same transaction
+        return [session.execute(insert(model), row).inserted_primary_key[0] for row in rows]
+    
     def add_prayer_request(self, prayer_data):
         """Add new prayer request to database"""
         session = self.Session()
@@ -136,57 +1036,158 @@ class DatabaseManager:
             )
             
             session.add(new_prayer)
-            session.commit()
+            session.flush()
+            sync_entity_tags(session, 'prayer', {new_prayer.id: prayer_data.get('tags', [])}, replace=False)
             
-            # Update user's prayer count
-            if prayer_data.get('user_id'):
-                user = session.query(User).filter_by(id=prayer_data['user_id']).first()
-                if user:
-                    user.prayer_count += 1
-                    session.commit()
+            # Update user's prayer count in the same transaction (or buffer it)
+            self.counters.increment('user_prayer_count', prayer_data.get('user_id'), session=session)
+            _bump_rollup(session, datetime.utcnow().date(), new_prayer.prayer_type, prayers=1)
+            self._mark_write()
+            ranked = (new_prayer.id, new_prayer.prayer_type, new_prayer.urgency_level, 0, new_prayer.created_at)
+            session.commit()
+            self._feed_event('add', *ranked)
             
-            return {'success': True, 'prayer_id': new_prayer.id}
+            return {'success': True, 'prayer_id': ranked[0]}
         except Exception as e:
             session.rollback()
             return {'success': False, 'error': str(e)}
         finally:
             session.close()
     
-    def get_prayer_requests(self, filters=None, limit=50):
-        """Get prayer requests with filters"""
+    def add_prayer_requests_bulk(self, prayers, chunk_size=1000):
+        """Insert many prayer requests, streaming the input in chunks
+        
+        Each chunk is one multi-row INSERT plus one set-based update of the
+        authors' prayer counts, committed together. Returns the new ids.
+        """
         session = self.Session()
+        prayer_ids = []
         try:
-            query = session.query(PrayerRequest)
-            
-            if filters:
-                if filters.get('prayer_type'):
-                    query = query.filter(PrayerRequest.prayer_type == filters['prayer_type'])
-                if filters.get('user_id'):
-                    query = query.filter(PrayerRequest.user_id == filters['user_id'])
-                if filters.get('status'):
-                    query = query.filter(PrayerRequest.status == filters['status'])
-                if filters.get('date_from'):
-                    query = query.filter(PrayerRequest.created_at >= filters['date_from'])
-                if filters.get('date_to'):
-                    query = query.filter(PrayerRequest.created_at <= filters['date_to'])
+            for chunk in chunked(prayers, chunk_size):
+                now = datetime.utcnow()
+                rows = [{
+                    'user_id': prayer_data.get('user_id'),
+                    'prayer_type': prayer_data.get('prayer_type'),
+                    'title': prayer_data.get('title', ''),
+                    'description': prayer_data.get('description', ''),
+                    'urgency_level': prayer_data.get('urgency_level', 5),
+                    'is_anonymous': prayer_data.get('is_anonymous', False),
+                    'status': prayer_data.get('status', 'pending'),
+                    'prayer_count': prayer_data.get('prayer_count', 0),
+                    'tags': json.dumps(prayer_data.get('tags', [])),
+                    'media_urls': json.dumps(prayer_data.get('media_urls', [])),
+                    'created_at': prayer_data.get('created_at') or now,
+                    'updated_at': prayer_data.get('updated_at') or prayer_data.get('created_at') or now,
+                } for prayer_data in chunk]
+                
+                chunk_ids = self._insert_chunk(session, PrayerRequest, rows)
+                prayer_ids.extend(chunk_ids)
+                sync_entity_tags(
+                    session, 'prayer',
+                    {prayer_id: prayer_data.get('tags', []) for prayer_id, prayer_data in zip(chunk_ids, chunk)},
+                    replace=False
+                )
+                _apply_counter_deltas(session, 'user_prayer_count', [row['user_id'] for row in rows])
+                cells = Counter()
+                for row in rows:
+                    answered = 1 if row['status'] == 'answered' else 0
+                    cell = cells.setdefault((row['created_at'].date(), row['prayer_type']), Counter())
+                    cell['prayers'] += 1
+                    cell['answered'] += answered
+                for (day, prayer_type), cell in cells.items():
+                    _bump_rollup(session, day, prayer_type, cell['prayers'], cell['answered'])
+                self._mark_write()
+                session.commit()
+                for prayer_id, row in zip(chunk_ids, rows):
+                    if row['status'] != 'answered':
+                        self._feed_event(
+                            'add', prayer_id, row['prayer_type'], row['urgency_level'],
+                            row['prayer_count'], row['created_at']
+                        )
             
-            query = query.order_by(PrayerRequest.created_at.desc())
-            prayers = query.limit(limit).all()
+            return {'success': True, 'prayer_ids': prayer_ids, 'count': len(prayer_ids)}
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e), 'prayer_ids': prayer_ids}
+        finally:
+            session.close()
+    
+    def get_prayer_requests(self, filters=None, limit=50, after=None, columns=None, columnar=None, decode_json=True,
+                            with_authors=False):
+        """Get prayer requests with filters, newest first
+        
+        Pass ``after`` as a ``(created_at, id)`` tuple or the ``next_cursor``
+        token from a previous page to continue scrolling (keyset pagination).
+        
+        ``columns`` selects only the named columns (no ORM hydration).
+        ``columnar='dict'`` returns a dict of lists and ``columnar='dataframe'``
+        a DataFrame instead of a list of row dicts. ``decode_json=False``
+        leaves ``tags``/``media_urls`` as JSON strings.
+        
+        Archived prayers are included when ``date_from`` reaches back past
+        the newest archived row, or with ``filters['include_archived']``.
+        
+        ``with_authors=True`` adds an ``author`` record (user_id, name,
+        avatar) per prayer from one batched lookup; anonymous prayers get
+        the Anonymous author and no ``user_id``.
+        """
+        from archive import needs_archive
+        if with_authors and columns:
+            columns = list(columns) + [n for n in ('user_id', 'is_anonymous') if n not in columns]
+        session = self.read_session()
+        try:
+            include_archive = needs_archive(session.get_bind(), filters)
+            query, names, selected = build_feed_query(filters, limit, after, columns, include_archive)
+            rows = session.execute(query).all()
+            if with_authors and columnar == 'dataframe':
+                import pandas as pd
+                result = attach_authors(session, materialize_feed(rows, names, selected, limit, 'dict', decode_json))
+                result['data'] = pd.DataFrame(result['data'], columns=names + ['author'])
+                return result
+            result = materialize_feed(rows, names, selected, limit, columnar, decode_json)
+            return attach_authors(session, result) if with_authors else result
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def get_ranked_feed(self, limit=20, cursor=None, columns=None, with_authors=False):
+        """Open prayer requests in "hot" order
+        
+        Emergency/critical and urgent requests with few prayers come first,
+        decaying with age (see ranking.py). Pass the returned ``next_cursor``
+        back as ``cursor`` for the next page. Each row carries its ``score``;
+        ``with_authors`` works as in get_prayer_requests().
+        """
+        from ranking import get_hot_feed, hot_score
+        if with_authors and columns:
+            columns = list(columns) + [n for n in ('user_id', 'is_anonymous') if n not in columns]
+        session = self.read_session()
+        try:
+            ranked, next_cursor = get_hot_feed(self.engine).page(limit, cursor)
+            table = PrayerRequest.__table__
+            names = list(columns) if columns else [c.name for c in table.columns]
+            selected = names + (['id'] if 'id' not in names else [])
+            rows = {}
+            if ranked:
+                for row in session.execute(
+                    select(*[table.c[n] for n in selected]).where(table.c.id.in_([i for _, i in ranked]))
+                ):
+                    rows[row[selected.index('id')]] = dict(zip(names, row))
             
-            # Convert to list of dictionaries
+            now = datetime.utcnow()
             result = []
-            for prayer in prayers:
-                prayer_dict = {c.name: getattr(prayer, c.name) for c in prayer.__table__.columns}
-                
-                # Parse JSON fields
-                if prayer_dict.get('tags'):
-                    prayer_dict['tags'] = json.loads(prayer_dict['tags'])
-                if prayer_dict.get('media_urls'):
-                    prayer_dict['media_urls'] = json.loads(prayer_dict['media_urls'])
-                
+            for key, prayer_id in ranked:
+                prayer_dict = rows.get(prayer_id)
+                if prayer_dict is None:
+                    continue  # deleted, or not yet on this replica
+                for field in ('tags', 'media_urls'):
+                    if prayer_dict.get(field):
+                        prayer_dict[field] = json.loads(prayer_dict[field])
+                prayer_dict['score'] = hot_score(key, now)
                 result.append(prayer_dict)
-            
-            return {'success': True, 'data': result, 'count': len(result)}
+            result = {'success': True, 'data': result, 'count': len(result), 'next_cursor': next_cursor}
+            return attach_authors(session, result) if with_authors else result
         except Exception as e:
             return {'success': False, 'error': str(e)}
         finally:
@@ -206,13 +1207,12 @@ class DatabaseManager:
             
             session.add(new_response)
             
-            # Update prayer count
-            prayer = session.query(PrayerRequest).filter_by(id=response_data['prayer_id']).first()
-            if prayer:
-                prayer.prayer_count += 1
-                prayer.updated_at = datetime.utcnow()
+            # Update prayer count atomically on the server
+            self.counters.increment('prayer_count', response_data['prayer_id'], session=session)
             
+            self._mark_write()
             session.commit()
+            self._feed_event('bump', {response_data['prayer_id']: 1})
             return {'success': True, 'response_id': new_response.id}
         except Exception as e:
             session.rollback()
@@ -220,49 +1220,422 @@ class DatabaseManager:
         finally:
             session.close()
     
-    def get_dashboard_stats(self):
-        """Get dashboard statistics"""
+    def get_prayer_responses(self, prayer_id, cursor=None, limit=50):
+        """Responses to one prayer, newest first, with keyset pagination
+        
+        Archived responses are included. ``user_id`` is hidden on anonymous
+        responses. Pass ``next_cursor`` back as ``cursor`` for the next page.
+        """
+        session = self.read_session()
+        try:
+            def page(table):
+                query = select(*table.c).where(table.c.prayer_id == prayer_id)
+                if cursor:
+                    cursor_created_at, cursor_id = decode_cursor(cursor)
+                    query = query.where(
+                        tuple_(table.c.created_at, table.c.id) < tuple_(cursor_created_at, cursor_id)
+                    )
+                return query.order_by(table.c.created_at.desc(), table.c.id.desc()).limit(limit + 1)
+            
+            merged = union_all(
+                page(PrayerResponse.__table__).subquery().select(),
+                page(PrayerResponseArchive.__table__).subquery().select(),
+            ).subquery()
+            rows = session.execute(
+                select(merged).order_by(merged.c.created_at.desc(), merged.c.id.desc()).limit(limit + 1)
+            ).mappings().all()
+            
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+            result = []
+            for row in rows:
+                response = dict(row)
+                if response['is_anonymous']:
+                    response['user_id'] = None
+                result.append(response)
+            return {'success': True, 'data': result, 'count': len(result), 'next_cursor': next_cursor}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def get_response_summary(self, prayer_ids):
+        """Counts per response_type for a page of prayers, in one grouped query
+        
+        Returns ``{prayer_id: {'prayed': n, 'comment': n, 'amen': n, ...}}``
+        with every requested id present.
+        """
+        prayer_ids = list(dict.fromkeys(prayer_ids))
+        summary = {prayer_id: dict.fromkeys(RESPONSE_TYPES, 0) for prayer_id in prayer_ids}
+        if not prayer_ids:
+            return {'success': True, 'summary': summary}
+        
+        session = self.read_session()
+        try:
+            responses = union_all(*[
+                select(table.c.prayer_id, table.c.response_type).where(table.c.prayer_id.in_(prayer_ids))
+                for table in (PrayerResponse.__table__, PrayerResponseArchive.__table__)
+            ]).subquery()
+            rows = session.execute(
+                select(responses.c.prayer_id, responses.c.response_type, func.count())
+                .group_by(responses.c.prayer_id, responses.c.response_type)
+            ).all()
+            for prayer_id, response_type, count in rows:
+                summary[prayer_id][response_type] = count
+            return {'success': True, 'summary': summary}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def add_prayer_responses_bulk(self, responses, chunk_size=1000):
+        """Insert many prayer responses, streaming the input in chunks
+        
+        Each chunk is one multi-row INSERT plus one set-based update of the
+        prayers' counts, committed together. Returns the new ids.
+        """
+        session = self.Session()
+        response_ids = []
+        try:
+            for chunk in chunked(responses, chunk_size):
+                now = datetime.utcnow()
+                rows = [{
+                    'prayer_id': response_data['prayer_id'],
+                    'user_id': response_data.get('user_id'),
+                    'response_type': response_data['response_type'],
+                    'comment': response_data.get('comment', ''),
+                    'is_anonymous': response_data.get('is_anonymous', False),
+                    'created_at': response_data.get('created_at') or now,
+                } for response_data in chunk]
+                
+                response_ids.extend(self._insert_chunk(session, PrayerResponse, rows))
+                _apply_counter_deltas(session, 'prayer_count', [row['prayer_id'] for row in rows])
+                self._mark_write()
+                session.commit()
+                self._feed_event('bump', Counter(row['prayer_id'] for row in rows))
+            
+            return {'success': True, 'response_ids': response_ids, 'count': len(response_ids)}
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e), 'response_ids': response_ids}
+        finally:
+            session.close()
+    
+    def add_blog_post(self, post_data):
+        """Add a blog post"""
+        session = self.Session()
+        try:
+            new_post = BlogPost(
+                title=post_data.get('title', ''),
+                content=post_data.get('content', ''),
+                author_id=post_data.get('author_id'),
+                category=post_data.get('category'),
+                tags=json.dumps(post_data.get('tags', [])),
+                featured_image=post_data.get('featured_image'),
+                is_published=post_data.get('is_published', True)
+            )
+            session.add(new_post)
+            session.flush()
+            sync_entity_tags(session, 'blog', {new_post.id: post_data.get('tags', [])}, replace=False)
+            self._mark_write()
+            session.commit()
+            return {'success': True, 'post_id': new_post.id}
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def update_blog_post(self, post_id, post_data):
+        """Update a blog post"""
         session = self.Session()
         try:
-            total_prayers = session.query(PrayerRequest).count()
-            answered_prayers = session.query(PrayerRequest).filter_by(status='answered').count()
-            total_users = session.query(User).count()
-            today_prayers = session.query(PrayerRequest).filter(
-                PrayerRequest.created_at >= datetime.today().date()
-            ).count()
+            post = session.query(BlogPost).filter_by(id=post_id).first()
+            if not post:
+                return {'success': False, 'error': 'Blog post not found'}
             
-            prayer_types = session.query(
-                PrayerRequest.prayer_type,
-                psycopg2.sql.SQL('count(*)')
-            ).group_by(PrayerRequest.prayer_type).all()
+            for field in ('title', 'content', 'category', 'featured_image', 'is_published'):
+                if field in post_data:
+                    setattr(post, field, post_data[field])
+            if 'tags' in post_data:
+                post.tags = json.dumps(post_data['tags'])
+                sync_entity_tags(session, 'blog', {post.id: post_data['tags']})
+            post.updated_at = datetime.utcnow()
             
+            self._mark_write()
+            session.commit()
+            return {'success': True, 'message': 'Blog post updated'}
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def get_tag_counts(self, entity_type='prayer', limit=50):
+        """Most used tags with their counts (tag cloud)"""
+        session = self.read_session()
+        try:
+            rows = session.execute(
+                select(Tag.name, func.count())
+                .join(EntityTag, EntityTag.tag_id == Tag.id)
+                .where(EntityTag.entity_type == entity_type)
+                .group_by(Tag.name)
+                .order_by(func.count().desc(), Tag.name)
+                .limit(limit)
+            ).all()
+            return {'success': True, 'tags': {name: count for name, count in rows}}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def rebuild_tag_index(self, chunk_size=1000):
+        """Backfill entity_tags from the JSON ``tags`` columns"""
+        session = self.Session()
+        try:
+            indexed = 0
+            for entity_type, model in (('prayer', PrayerRequest), ('blog', BlogPost)):
+                last_id = 0
+                while True:
+                    rows = session.execute(
+                        select(model.id, model.tags)
+                        .where(model.id > last_id)
+                        .order_by(model.id)
+                        .limit(chunk_size)
+                    ).all()
+                    if not rows:
+                        break
+                    sync_entity_tags(session, entity_type, {
+                        row_id: json.loads(tags) if tags else [] for row_id, tags in rows
+                    })
+                    self._mark_write()
+                    session.commit()
+                    indexed += len(rows)
+                    last_id = rows[-1][0]
+            return {'success': True, 'indexed': indexed}
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def record_blog_view(self, post_id):
+        """Count a blog post view"""
+        try:
+            self.counters.increment('view_count', post_id)
+            return {'success': True}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def mark_prayer_answered(self, prayer_id, answered_details=''):
+        """Mark a prayer request as answered"""
+        session = self.Session()
+        try:
+            prayer = session.query(PrayerRequest).filter_by(id=prayer_id).first()
+            if not prayer:
+                return {'success': False, 'error': 'Prayer request not found'}
+            
+            now = datetime.utcnow()
+            changed = session.execute(
+                update(PrayerRequest)
+                .where(PrayerRequest.id == prayer_id, PrayerRequest.status != 'answered')
+                .values(status='answered', answered_details=answered_details, answered_at=now, updated_at=now)
+            ).rowcount
+            if changed:
+                _bump_rollup(session, prayer.created_at.date(), prayer.prayer_type, answered=1)
+            
+            self._mark_write()
+            session.commit()
+            if changed:
+                self._feed_event('remove', prayer_id)
+            return {'success': True, 'changed': bool(changed)}
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def _compute_dashboard_stats(self):
+        """One round-trip: conditional counts per prayer type plus the user count"""
+        session = self.read_session()
+        try:
+            rows = session.execute(build_dashboard_stats_query(self.use_stats_rollup)).all()
+            total_users = rows[0][4] if rows else session.execute(select(func.count()).select_from(User)).scalar()
+            return summarize_dashboard_stats(rows, total_users)
+        finally:
+            session.close()
+    
+    def get_dashboard_stats(self, use_cache=True):
+        """Get dashboard statistics (cached process-wide for ``stats_cache.ttl`` seconds)"""
+        try:
+            if not use_cache:
+                return {'success': True, 'stats': self._compute_dashboard_stats()}
+            key = (self.engine.url, self.use_stats_rollup)
+            return {'success': True, 'stats': stats_cache.get(key, self._compute_dashboard_stats)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def rebuild_stats_rollup(self):
+        """Recompute the stats rollup table from live and archived prayer requests"""
+        session = self.Session()
+        try:
+            prayers = prayer_history('prayer_type', 'status', 'created_at')
+            day = func.date(prayers.c.created_at)
+            rows = session.execute(
+                select(
+                    day,
+                    prayers.c.prayer_type,
+                    func.count(),
+                    func.sum(case((prayers.c.status == 'answered', 1), else_=0)),
+                ).group_by(day, prayers.c.prayer_type)
+            ).all()
+            
+            session.query(PrayerStatsRollup).delete()
+            session.add_all([
+                PrayerStatsRollup(
+                    day=row[0] if isinstance(row[0], date) else date.fromisoformat(str(row[0])),
+                    prayer_type=row[1] or '',
+                    prayer_count=int(row[2] or 0),
+                    answered_count=int(row[3] or 0)
+                )
+                for row in rows
+            ])
+            self._mark_write()
+            session.commit()
+            stats_cache.invalidate()
+            return {'success': True, 'cells': len(rows)}
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def archive_answered(self, older_than_days=None, batch_size=1000, max_batches=None, pause=0):
+        """Move old answered prayers and their responses to the archive tables"""
+        from archive import archive_answered, ARCHIVE_AFTER_DAYS
+        try:
+            self._mark_write()
+            moved = archive_answered(
+                self.engine, older_than_days or ARCHIVE_AFTER_DAYS, batch_size, max_batches, pause
+            )
+            return {'success': True, **moved}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def start_archiver(self, interval=3600, older_than_days=None, batch_size=1000, pause=0.1):
+        """Run archive_answered() in a background thread every ``interval`` seconds"""
+        from archive import start_archiver, ARCHIVE_AFTER_DAYS
+        return start_archiver(
+            self.engine, interval,
+            older_than_days=older_than_days or ARCHIVE_AFTER_DAYS, batch_size=batch_size, pause=pause
+        )
+    
+    def _wait_for_replicas(self, timeout=30):
+        """Block (up to ``timeout`` seconds) while any replica lags past ``max_replica_lag``"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and any(
+            replica_lag(e) > self.max_replica_lag for e in self.replica_engines
+        ):
+            time.sleep(REPLICA_LAG_CHECK_INTERVAL)
+    
+    def purge_expired(self, dry_run=False, policies=None, max_age_days=None, archive=True,
+                      batch_size=500, pause=0.05, max_batches=None):
+        """Apply the retention policies (see retention.py); ``dry_run`` only reports counts"""
+        from retention import retention_report, purge_expired
+        try:
+            if dry_run:
+                return {'success': True, 'dry_run': True,
+                        'policies': retention_report(self.engine, policies, max_age_days, batch_size, archive)}
+            self._mark_write()
+            purged = purge_expired(
+                self.engine, policies, max_age_days, archive, batch_size, pause, max_batches,
+                throttle=self._wait_for_replicas if self.replica_engines else None
+            )
+            return {'success': True, 'dry_run': False, 'policies': purged}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def get_notifications(self, user_id, unread_only=False, limit=50):
+        """A user's notifications, newest first"""
+        session = self.read_session()
+        try:
+            query = select(Notification.__table__).where(Notification.user_id == user_id)
+            if unread_only:
+                query = query.where(Notification.is_read.is_(False))
+            rows = session.execute(query.order_by(Notification.created_at.desc()).limit(limit)).mappings().all()
+            return {'success': True, 'data': [dict(row) for row in rows], 'count': len(rows)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def count_unread_notifications(self, user_id):
+        """Unread badge count (index-only on user_id, is_read)"""
+        session = self.read_session()
+        try:
+            count = session.execute(
+                select(func.count()).select_from(Notification)
+                .where(Notification.user_id == user_id, Notification.is_read.is_(False))
+            ).scalar()
+            return {'success': True, 'count': count}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+    
+    def export_prayer_requests(self, dest=None, fmt='csv', filters=None, compression=None, chunk_size=5000):
+        """Stream prayer requests to CSV/Parquet; see ``data_export.export_prayer_requests``"""
+        from data_export import export_prayer_requests
+        return export_prayer_requests(self.read_engine(), dest, fmt, filters, compression, chunk_size)
+    
+    def search(self, query_text, entity_type='prayer', limit=20, page=1):
+        """Ranked full-text search over prayers ('prayer') or blog posts ('blog')"""
+        from search import search
+        try:
+            results = search(self.read_engine(), query_text, entity_type, limit + 1, (page - 1) * limit)
             return {
                 'success': True,
-                'stats': {
-                    'total_prayers': total_prayers,
-                    'answered_prayers': answered_prayers,
-                    'answer_rate': (answered_prayers / total_prayers * 100) if total_prayers > 0 else 0,
-                    'total_users': total_users,
-                    'today_prayers': today_prayers,
-                    'prayer_types': dict(prayer_types)
-                }
+                'data': results[:limit],
+                'count': len(results[:limit]),
+                'page': page,
+                'has_more': len(results) > limit
             }
         except Exception as e:
             return {'success': False, 'error': str(e)}
-        finally:
-            session.close()
     
-    def backup_database(self):
-        """Create database backup"""
-        # This would implement backup logic
-        pass
+    def backup_database(self, dest_dir='backups', incremental=False, fmt='jsonl', compression='gzip', chunk_size=5000):
+        """Create database backup (streaming, optionally incremental); see ``backup.backup_database``"""
+        from backup import backup_database
+        try:
+            manifest = backup_database(self.engine, dest_dir, fmt, compression, incremental, chunk_size)
+            return {'success': True, 'manifest': manifest}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def restore_database(self, backup_path='backups', chunk_size=5000):
+        """Restore a backup written by ``backup_database``"""
+        from backup import restore_database
+        try:
+            self._mark_write()
+            restored = restore_database(self.engine, backup_path, chunk_size)
+            stats_cache.invalidate()
+            return {'success': True, 'restored': restored}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
 
 # Streamlit Database UI
 def database_management_ui():
+    import pandas as pd
+    import streamlit as st
     st.header("🗄️ Database Management")
     
-    db_type = st.selectbox("Database Type", ["PostgreSQL", "MySQL"])
-    db_manager = DatabaseManager(db_type.lower())
+    db_type = st.selectbox("Database Type", ["PostgreSQL", "MySQL", "SQLite"])
+    db_manager = st.session_state.get('db_manager')
+    if db_manager is None or db_manager.db_type != db_type.lower():
+        db_manager = DatabaseManager(db_type.lower(), state=st.session_state)
+        st.session_state.db_connected = False
     
     if st.button("🔗 Connect to Database"):
         if db_manager.connect():
@@ -288,21 +1661,90 @@ def database_management_ui():
         
         # Prayer Requests Table
         if st.button("📋 View Prayer Requests"):
-            prayers = db_manager.get_prayer_requests(limit=20)
+            prayers = db_manager.get_prayer_requests(
+                limit=20,
+                columns=['id', 'prayer_type', 'urgency_level', 'status', 'created_at', 'prayer_count'],
+                columnar='dataframe'
+            )
             if prayers['success']:
-                df = pd.DataFrame(prayers['data'])
-                st.dataframe(df[['id', 'prayer_type', 'urgency_level', 'status', 'created_at', 'prayer_count']])
+                st.dataframe(prayers['data'])
+        
+        # Search
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            search_text = st.text_input("🔍 Search")
+        with col2:
+            search_scope = st.selectbox("In", ["Prayers", "Blog Posts"])
+        if search_text:
+            results = db_manager.search(search_text, 'prayer' if search_scope == "Prayers" else 'blog')
+            if results['success']:
+                st.dataframe(pd.DataFrame(results['data'], columns=['id', 'title', 'rank']))
+            else:
+                st.error(f"Search failed: {results['error']}")
         
         # Export Data
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            export_format = st.selectbox("Export Format", ["csv", "parquet"])
+        with col2:
+            export_from = st.date_input("From", value=None)
+        with col3:
+            export_to = st.date_input("To", value=None)
+        
         if st.button("📥 Export Data"):
-            prayers = db_manager.get_prayer_requests()
-            if prayers['success']:
-                df = pd.DataFrame(prayers['data'])
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    label="📥 Download CSV",
-                    data=csv,
-                    file_name="prayer_requests.csv",
-                    mime="text/csv"
+            export_filters = {}
+            if export_from:
+                export_filters['date_from'] = datetime.combine(export_from, datetime.min.time())
+            if export_to:
+                export_filters['date_to'] = datetime.combine(export_to, datetime.max.time())
+            
+            # Stream to a temp file of this export's own so memory stays bounded regardless of table size
+            suffix = '.csv.gz' if export_format == 'csv' else '.parquet'
+            fd, export_path = tempfile.mkstemp(prefix='prayer_requests_', suffix=suffix)
+            os.close(fd)
+            try:
+                result = db_manager.export_prayer_requests(
+                    export_path,
+                    fmt=export_format,
+                    filters=export_filters,
+                    compression='gzip' if export_format == 'csv' else 'zstd'
                 )
-```
+                if result['success']:
+                    st.caption(f"Exported {result['rows']} rows")
+                    with open(export_path, 'rb') as export_file:
+                        st.download_button(
+                            label="📥 Download Export",
+                            data=export_file,
+                            file_name=f"prayer_requests{suffix}",
+                            mime="application/octet-stream"
+                        )
+                else:
+                    st.error(f"Export failed: {result['error']}")
+            finally:
+                os.remove(export_path)  # download_button has already read it
+        
+        # Archive answered prayers
+        archive_days = st.number_input("Archive prayers answered more than N days ago", min_value=1, value=180)
+        if st.button("🗃️ Archive Answered Prayers"):
+            result = db_manager.archive_answered(older_than_days=int(archive_days))
+            if result['success']:
+                st.success(f"Archived {result['prayers']} prayers and {result['responses']} responses")
+            else:
+                st.error(f"Archiving failed: {result['error']}")
+        
+        # Retention
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🧹 Retention Dry Run"):
+                result = db_manager.purge_expired(dry_run=True)
+                if result['success']:
+                    st.dataframe(pd.DataFrame(result['policies']).T)
+                else:
+                    st.error(f"Dry run failed: {result['error']}")
+        with col2:
+            if st.button("🧹 Purge Expired Rows"):
+                result = db_manager.purge_expired()
+                if result['success']:
+                    st.dataframe(pd.DataFrame(result['policies']).T)
+                else:
+                    st.error(f"Purge failed: {result['error']}")
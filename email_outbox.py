@@ -0,0 +1,280 @@
+import atexit
+import random
+import secrets
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from sqlalchemy import select, insert, update, bindparam, func
+from database import OutboxEmail
+
+BATCH_SIZE = 50  # messages claimed per round trip
+POLL_INTERVAL = 5  # seconds the worker sleeps when the outbox is empty
+MAX_ATTEMPTS = 6  # deliveries tried before a message is marked failed
+RETRY_BASE = 30  # seconds before the first retry, doubled per attempt
+RETRY_MAX = 3600
+STALE_AFTER = 600  # seconds before a message stuck in 'sending' is claimed again
+NOOP_AFTER = 30  # idle seconds after which a reused connection is checked with NOOP
+
+outbox = OutboxEmail.__table__
+
+def smtp_config():
+    """SMTP settings from Streamlit secrets"""
+    from database import _secret
+    return {
+        'host': _secret('SMTP_SERVER', 'localhost'),
+        'port': int(_secret('SMTP_PORT', 587)),
+        'username': _secret('EMAIL_USER'),
+        'password': _secret('EMAIL_PASSWORD'),
+        'sender': _secret('EMAIL_FROM', 'noreply@localhost'),
+        'starttls': str(_secret('SMTP_STARTTLS', True)).lower() not in ('0', 'false', 'no'),
+        'rate': float(_secret('EMAIL_RATE_LIMIT', 0)) or None,  # messages per second
+    }
+
+def build_message(sender, recipient, subject, body, content_type='html'):
+    msg = MIMEText(body, content_type)
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = recipient
+    return msg
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` sends per second with bursts of ``burst``"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate or 0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class SMTPConnection:
+    """One authenticated SMTP session reused across sends, reopened when dropped"""
+
+    def __init__(self, config, timeout=30):
+        self.config = config
+        self.timeout = timeout
+        self._smtp = None
+        self._last_used = 0
+
+    def _open(self):
+        smtp = smtplib.SMTP(self.config['host'], self.config['port'], timeout=self.timeout)
+        try:
+            if self.config.get('starttls'):
+                smtp.starttls()
+            if self.config.get('username'):
+                smtp.login(self.config['username'], self.config['password'])
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+
+    def _ready(self):
+        if self._smtp is not None and time.monotonic() - self._last_used > NOOP_AFTER:
+            try:
+                if self._smtp.noop()[0] != 250:
+                    self.close()
+            except smtplib.SMTPException:
+                self.close()
+        if self._smtp is None:
+            self._smtp = self._open()
+        return self._smtp
+
+    def send(self, msg):
+        """Send ``msg``, reconnecting once if the server dropped the idle session"""
+        try:
+            self._ready().send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._ready().send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except Exception:
+                smtp.close()
+
+def is_permanent_failure(error):
+    """5xx replies and refused recipients will not succeed on retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(error, 'smtp_code', None)
+    return isinstance(code, int) and 500 <= code < 600
+
+def keeps_session(error):
+    """After a rejected command smtplib has sent RSET, so the session is still usable"""
+    return isinstance(error, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused))
+
+def retry_delay(attempts, base=RETRY_BASE, maximum=RETRY_MAX):
+    """Exponential backoff with jitter so failed messages do not retry in lockstep"""
+    return min(maximum, base * 2 ** (attempts - 1)) * (0.5 + random.random() / 2)
+
+class OutboxWorker:
+    """Background thread delivering queued emails over a reused SMTP connection
+
+    Each round claims up to ``batch_size`` due messages (marking them
+    'sending' under a claim token so concurrent workers skip them), sends
+    them through one connection, paced by ``rate`` messages per second, and
+    records the outcomes in two statements. Transient failures are retried
+    with exponential backoff; permanent ones (5xx) and messages out of
+    attempts are marked 'failed'. Messages left 'sending' by a crashed
+    worker are picked up again after ``stale_after`` seconds.
+    """
+
+    def __init__(self, engine, config=None, batch_size=BATCH_SIZE, poll_interval=POLL_INTERVAL,
+                 max_attempts=MAX_ATTEMPTS, rate=None, stale_after=STALE_AFTER, start=True):
+        self.engine = engine
+        self.config = config or smtp_config()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.stale_after = stale_after
+        self.limiter = RateLimiter(rate if rate is not None else self.config.get('rate'))
+        self.connection = SMTPConnection(self.config)
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        if start:
+            self.start()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.process_batch()
+            except Exception as e:
+                self.last_error = str(e)
+                sent = 0
+            if not sent:
+                self.connection.close()  # don't hold an idle session open
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        self.connection.close()
+
+    def _claim(self):
+        now = datetime.utcnow()
+        token = secrets.token_hex(16)
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(outbox)
+                .where(outbox.c.status == 'sending', outbox.c.claimed_at < now - timedelta(seconds=self.stale_after))
+                .values(status='pending', claim_token=None)
+            )
+            due = select(outbox.c.id).where(
+                outbox.c.status == 'pending', outbox.c.next_attempt_at <= now
+            ).order_by(outbox.c.next_attempt_at, outbox.c.id).limit(self.batch_size)
+            ids = connection.execute(due).scalars().all()
+            if not ids:
+                return []
+            connection.execute(
+                update(outbox).where(outbox.c.id.in_(ids), outbox.c.status == 'pending')
+                .values(status='sending', claim_token=token, claimed_at=now, attempts=outbox.c.attempts + 1)
+            )
+            return connection.execute(
+                select(outbox.c.id, outbox.c.recipient, outbox.c.subject, outbox.c.body,
+                       outbox.c.content_type, outbox.c.attempts)
+                .where(outbox.c.claim_token == token).order_by(outbox.c.id)
+            ).all()
+
+    def process_batch(self):
+        """Deliver one batch of due messages; returns how many were sent"""
+        rows = self._claim()
+        sent, failures = [], []
+        for row in rows:
+            self.limiter.acquire()
+            msg = build_message(self.config['sender'], row.recipient, row.subject, row.body,
+                                row.content_type or 'html')
+            try:
+                self.connection.send(msg)
+                sent.append(row.id)
+            except Exception as e:
+                if not keeps_session(e):
+                    self.connection.close()  # the session itself may be broken
+                permanent = is_permanent_failure(e) or row.attempts >= self.max_attempts
+                failures.append({
+                    'row_id': row.id,
+                    'new_status': 'failed' if permanent else 'pending',
+                    'retry_at': datetime.utcnow() + timedelta(seconds=retry_delay(row.attempts)),
+                    'error': str(e)[:1000],
+                })
+                self.last_error = str(e)
+
+        if rows:
+            with self.engine.begin() as connection:
+                if sent:
+                    connection.execute(
+                        update(outbox).where(outbox.c.id.in_(sent))
+                        .values(status='sent', sent_at=datetime.utcnow(), claim_token=None, last_error=None)
+                    )
+                if failures:
+                    connection.execute(
+                        update(outbox).where(outbox.c.id == bindparam('row_id')).values(
+                            status=bindparam('new_status'), next_attempt_at=bindparam('retry_at'),
+                            last_error=bindparam('error'), claim_token=None,
+                        ),
+                        failures,
+                    )
+        return len(sent)
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+def start_outbox_worker(engine, **options):
+    """One outbox worker per engine"""
+    with _workers_lock:
+        worker = _workers.get(id(engine))
+        if worker is None:
+            worker = _workers[id(engine)] = OutboxWorker(engine, **options)
+        return worker
+
+def enqueue_email(engine, recipient, subject, body, content_type='html', start_worker=True):
+    """Persist a message for background delivery and nudge the worker; returns its outbox id"""
+    with engine.begin() as connection:
+        message_id = connection.execute(
+            insert(outbox).values(
+                recipient=recipient, subject=subject, body=body, content_type=content_type,
+                status='pending', attempts=0, next_attempt_at=datetime.utcnow(), created_at=datetime.utcnow(),
+            )
+        ).inserted_primary_key[0]
+    worker = start_outbox_worker(engine) if start_worker else _workers.get(id(engine))
+    if worker is not None:
+        worker.wake()
+    return message_id
+
+def outbox_stats(engine):
+    """Message counts by status"""
+    with engine.connect() as connection:
+        return dict(connection.execute(
+            select(outbox.c.status, func.count()).group_by(outbox.c.status)
+        ).all())
@@ -0,0 +1,136 @@
+import hashlib
+import heapq
+import secrets
+import threading
+import time
+from collections import OrderedDict
+import jwt
+
+DEFAULT_KID = 'default'  # key id assumed for tokens issued before key rotation
+CACHE_SIZE = 10000  # verified tokens kept per process
+CACHE_TTL = 300  # seconds a verified token is trusted without re-checking the signature
+
+class TokenVerifier:
+    """HS256 JWT signing/verification with key rotation, a verified-token cache and a deny-list
+
+    Tokens carry the signing key's id in the ``kid`` header; any key in
+    ``keys`` verifies, only ``active_kid`` signs. Verified payloads are
+    cached by SHA-256 of the token until ``exp`` (or ``ttl``), so repeat
+    checks are a dictionary lookup. Revoked ``jti`` values are kept until
+    the token would have expired anyway; a min-heap on ``exp`` lets every
+    revoke()/verify() drop the expired ones, so the deny-list only holds
+    tokens that are still live.
+    """
+
+    def __init__(self, keys, active_kid, cache_size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._cache = OrderedDict()  # digest -> (trusted until, exp, kid, payload)
+        self._revoked = {}  # jti -> exp
+        self._revoked_by_exp = []  # heap of (exp, jti) for pruning
+        self._lock = threading.Lock()
+        self.set_keys(keys, active_kid)
+
+    def set_keys(self, keys, active_kid):
+        """Replace the key set; tokens signed with a dropped kid stop verifying"""
+        if active_kid not in keys:
+            raise ValueError(f"Active key id {active_kid!r} is not among the keys")
+        self.keys = dict(keys)
+        self.active_kid = active_kid
+
+    def sign(self, payload):
+        payload = dict(payload)
+        payload.setdefault('jti', secrets.token_urlsafe(12))
+        return jwt.encode(payload, self.keys[self.active_kid], algorithm='HS256',
+                          headers={'kid': self.active_kid})
+
+    def _prune_revoked(self, now):
+        """Forget revocations of tokens that have expired (caller holds the lock)"""
+        heap = self._revoked_by_exp
+        while heap and heap[0][0] <= now:
+            exp, jti = heapq.heappop(heap)
+            if self._revoked.get(jti) == exp:
+                del self._revoked[jti]
+
+    def _is_revoked(self, jti, now):
+        self._prune_revoked(now)
+        return jti is not None and jti in self._revoked
+
+    def verify(self, token):
+        """Same result dicts as AuthSystem.verify_jwt_token"""
+        if not isinstance(token, (str, bytes)):
+            # Missing cookie/header: answer as jwt.decode would, before hashing
+            return {'success': False, 'error': 'Invalid token'}
+        digest = hashlib.sha256(token.encode() if isinstance(token, str) else token).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(digest)
+            if entry is not None:
+                trusted_until, exp, kid, payload = entry
+                if exp is not None and exp <= now:
+                    del self._cache[digest]
+                    return {'success': False, 'error': 'Token expired'}
+                if trusted_until > now and kid in self.keys:
+                    if self._is_revoked(payload.get('jti'), now):
+                        return {'success': False, 'error': 'Token revoked'}
+                    self._cache.move_to_end(digest)
+                    return {'success': True, 'payload': dict(payload)}
+                del self._cache[digest]
+
+        try:
+            kid = jwt.get_unverified_header(token).get('kid', DEFAULT_KID)
+            key = self.keys.get(kid)
+            if key is None:
+                return {'success': False, 'error': 'Invalid token'}
+            payload = jwt.decode(token, key, algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            return {'success': False, 'error': 'Token expired'}
+        except jwt.InvalidTokenError:
+            return {'success': False, 'error': 'Invalid token'}
+
+        exp = payload.get('exp')
+        with self._lock:
+            if self._is_revoked(payload.get('jti'), now):
+                return {'success': False, 'error': 'Token revoked'}
+            trusted_until = now + self.ttl if exp is None else min(exp, now + self.ttl)
+            self._cache[digest] = (trusted_until, exp, kid, payload)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return {'success': True, 'payload': dict(payload)}
+
+    def revoke(self, token):
+        """Deny a token (by its ``jti``) for the rest of its lifetime in this process
+
+        Only tokens that verify are accepted, so forged tokens cannot grow
+        the deny-list; already expired or invalid ones are ignored.
+        """
+        try:
+            key = self.keys.get(jwt.get_unverified_header(token).get('kid', DEFAULT_KID))
+            if key is None:
+                return False
+            payload = jwt.decode(token, key, algorithms=['HS256'])
+        except jwt.InvalidTokenError:
+            return False
+        jti = payload.get('jti')
+        if jti is None:
+            return False
+        now = time.time()
+        exp = payload.get('exp') or now + self.ttl
+        with self._lock:
+            self._prune_revoked(now)
+            self._revoked[jti] = exp
+            heapq.heappush(self._revoked_by_exp, (exp, jti))
+        return True
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+def get_token_verifier(keys, active_kid):
+    """The process-wide verifier, updated in place when the configured keys change"""
+    global _verifier
+    with _verifier_lock:
+        if _verifier is None:
+            _verifier = TokenVerifier(keys, active_kid)
+        elif _verifier.keys != keys or _verifier.active_kid != active_kid:
+            _verifier.set_keys(keys, active_kid)
+        return _verifier
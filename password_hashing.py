@@ -0,0 +1,147 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_SCHEME = 'scrypt'
+MAX_QUEUE = 64  # hashing jobs allowed to wait for a worker before logins are shed
+QUEUE_TIMEOUT = 2  # seconds a caller waits for a queue slot
+
+class HasherBusy(Exception):
+    """The hashing queue is full; the caller should retry later"""
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip('=')
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+def _params(text):
+    return {key: int(value) for key, value in (item.split('=') for item in text.split(','))}
+
+class ScryptHasher:
+    """``$scrypt$ln=14,r=8,p=1$salt$hash``; ``cost`` is log2 of the scrypt N parameter"""
+    scheme = 'scrypt'
+    default_cost = 14
+
+    def __init__(self, cost=None, r=8, p=1):
+        self.cost = cost or self.default_cost
+        self.r = r
+        self.p = p
+
+    def _derive(self, password, salt, ln, r, p):
+        n = 1 << ln
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p, dklen=32, maxmem=256 * r * (n + p) + 1024 * 1024
+        )
+
+    def hash(self, password):
+        salt = secrets.token_bytes(16)
+        digest = self._derive(password, salt, self.cost, self.r, self.p)
+        return f"$scrypt$ln={self.cost},r={self.r},p={self.p}${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password, params, salt, digest):
+        values = _params(params)
+        return hmac.compare_digest(self._derive(password, _unb64(salt), values['ln'], values['r'], values['p']),
+                                   _unb64(digest))
+
+    def is_current(self, params):
+        return _params(params) == {'ln': self.cost, 'r': self.r, 'p': self.p}
+
+class PBKDF2Hasher:
+    """``$pbkdf2-sha256$i=600000$salt$hash``; ``cost`` is the iteration count"""
+    scheme = 'pbkdf2-sha256'
+    default_cost = 600000
+
+    def __init__(self, cost=None):
+        self.cost = cost or self.default_cost
+
+    def hash(self, password):
+        salt = secrets.token_bytes(16)
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, self.cost)
+        return f"$pbkdf2-sha256$i={self.cost}${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password, params, salt, digest):
+        iterations = _params(params)['i']
+        return hmac.compare_digest(hashlib.pbkdf2_hmac('sha256', password.encode(), _unb64(salt), iterations),
+                                   _unb64(digest))
+
+    def is_current(self, params):
+        return _params(params)['i'] == self.cost
+
+HASHERS = {hasher.scheme: hasher for hasher in (ScryptHasher, PBKDF2Hasher)}
+
+def _verify_legacy(password, stored):
+    """The original ``salt$sha256(password + salt)`` format"""
+    salt, hashed = stored.split('$')
+    return hmac.compare_digest(hashlib.sha256((password + salt).encode()).hexdigest(), hashed)
+
+class PasswordHasher:
+    """Self-describing password hashes computed on a bounded worker pool
+
+    ``hash()`` always uses the configured scheme and cost. ``verify()``
+    accepts any known scheme, any cost and legacy ``salt$hash`` values, and
+    reports whether the hash should be replaced. Work runs on at most
+    ``max_workers`` threads (hashlib's KDFs release the GIL) with at most
+    ``max_queue`` jobs waiting; beyond that HasherBusy is raised so a login
+    burst cannot pile up unbounded CPU work.
+    """
+
+    def __init__(self, scheme=DEFAULT_SCHEME, cost=None, max_workers=None, max_queue=MAX_QUEUE,
+                 queue_timeout=QUEUE_TIMEOUT):
+        self.hasher = HASHERS[scheme](cost)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-hash')
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HasherBusy("Too many password operations in progress")
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(self.hasher.hash, password)
+
+    def _check(self, password, stored):
+        if not stored:
+            return False, False
+        if not stored.startswith('$'):
+            matches = _verify_legacy(password, stored)
+            return matches, matches
+        _, scheme, params, salt, digest = stored.split('$')
+        if scheme not in HASHERS:
+            return False, False
+        hasher = self.hasher if scheme == self.hasher.scheme else HASHERS[scheme]()
+        if not hasher.verify(password, params, salt, digest):
+            return False, False
+        return True, scheme != self.hasher.scheme or not self.hasher.is_current(params)
+
+    def verify(self, password, stored):
+        """(matches, needs_rehash) for a stored hash of any supported format"""
+        try:
+            return self._run(self._check, password, stored)
+        except HasherBusy:
+            raise
+        except Exception:
+            return False, False
+
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+def get_password_hasher(scheme=DEFAULT_SCHEME, cost=None):
+    """The process-wide hasher (and worker pool) for a scheme and cost"""
+    with _hashers_lock:
+        hasher = _hashers.get((scheme, cost))
+        if hasher is None:
+            hasher = _hashers[(scheme, cost)] = PasswordHasher(scheme, cost)
+        return hasher
@@ -0,0 +1,188 @@
+import contextvars
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from sqlalchemy import event
+
+logger = logging.getLogger('vakyadharam.sql')
+
+SLOW_QUERY_MS = 200  # statements slower than this are logged
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, float('inf'))
+MAX_SCOPES = 200  # reruns (and sessions) kept for per-scope summaries
+MAX_STATEMENTS = 1000  # distinct statement fingerprints tracked
+
+_current_scope = contextvars.ContextVar('query_scope', default=None)
+_lock = threading.Lock()
+_instrumented = weakref.WeakSet()  # engines, not ids: a new engine may reuse a disposed one's id
+_histogram = [0] * len(LATENCY_BUCKETS_MS)
+_statements = {}
+_scopes = OrderedDict()
+_sessions = OrderedDict()
+
+_IGNORED_PATHS = (os.sep + 'sqlalchemy' + os.sep, os.path.abspath(__file__))
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+def _fingerprint(statement):
+    """Statement text with literals and IN-lists collapsed"""
+    statement = _LITERALS.sub('?', ' '.join(statement.split()))
+    return re.sub(r'\((?:\s*\?\s*,)+\s*\?\s*\)', '(?...)', statement)
+
+def _call_site():
+    """First stack frame outside SQLAlchemy and this module"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        # Skip SQLAlchemy, this module, contextlib and generated code ("<...>")
+        if not filename.startswith('<') and 'contextlib' not in filename \
+                and not any(path in filename for path in _IGNORED_PATHS):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+def _redact(parameters):
+    """Parameter shapes only; values never reach the log"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+    rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    record(statement, elapsed_ms, rows, _call_site(), parameters)
+
+def _handle_error(context):
+    """A statement raised, so the after hook never runs: close out its timing here"""
+    connection = context.connection
+    starts = connection.info.get('query_start') if connection is not None else None
+    if not starts or context.statement is None:
+        return  # not a statement execution (e.g. a failed connect)
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    record(context.statement, elapsed_ms, None, _call_site(), context.parameters, failed=True)
+
+def _scope_entry(store, key):
+    entry = store.get(key)
+    if entry is None:
+        entry = store[key] = {'queries': 0, 'total_ms': 0.0, 'rows': 0, 'statements': []}
+        while len(store) > MAX_SCOPES:
+            store.popitem(last=False)
+    return entry
+
+def record(statement, elapsed_ms, rows=None, call_site=None, parameters=None, failed=False):
+    """Add one executed statement to the global and current-scope stats"""
+    fingerprint = _fingerprint(statement)
+    with _lock:
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                _histogram[i] += 1
+                break
+
+        stats = _statements.get(fingerprint)
+        if stats is None and len(_statements) < MAX_STATEMENTS:
+            stats = _statements[fingerprint] = {
+                'statement': fingerprint, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'rows': 0, 'errors': 0, 'call_sites': {},
+            }
+        if stats is not None:
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['rows'] += rows or 0
+            stats['errors'] += failed
+            if call_site:
+                stats['call_sites'][call_site] = stats['call_sites'].get(call_site, 0) + 1
+
+        scope, session = _current_scope.get() or (None, None)
+        if scope is not None:
+            entry = _scope_entry(_scopes, scope)
+            if len(entry['statements']) < 100:
+                entry['statements'].append({
+                    'statement': fingerprint, 'ms': elapsed_ms, 'rows': rows, 'call_site': call_site,
+                    'failed': failed,
+                })
+            for target in (entry, _scope_entry(_sessions, session) if session is not None else None):
+                if target is not None:
+                    target['queries'] += 1
+                    target['total_ms'] += elapsed_ms
+                    target['rows'] += rows or 0
+
+    if failed:
+        logger.warning(
+            "Failed query (%.1f ms) at %s: %s params=%s", elapsed_ms, call_site, fingerprint, _redact(parameters)
+        )
+    elif elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms, rows=%s) at %s: %s params=%s",
+            elapsed_ms, rows, call_site, fingerprint, _redact(parameters)
+        )
+
+def instrument_engine(engine):
+    """Attach the timing hooks to an engine (idempotent)"""
+    if engine in _instrumented:
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+    _instrumented.add(engine)
+
+def start_scope(scope, session=None):
+    """Attribute the following queries in this context to ``scope`` (e.g. a rerun)
+
+    The scope lasts until the next start_scope() in the same context, which
+    is how reruns hand over to each other. ``session`` additionally
+    accumulates totals across that session's scopes.
+    """
+    with _lock:
+        _scopes.pop(scope, None)
+    _current_scope.set((scope, session))
+
+def scope_summary(scope, store=None):
+    """Query count, time and statements recorded for one scope"""
+    with _lock:
+        entry = (store if store is not None else _scopes).get(scope)
+        if entry is None:
+            return {'queries': 0, 'total_ms': 0.0, 'rows': 0, 'statements': []}
+        return {**entry, 'statements': list(entry['statements'])}
+
+def session_summary(session):
+    """Totals across every recorded scope of one session"""
+    return scope_summary(session, _sessions)
+
+def summary(top=10):
+    """Process-wide latency histogram and the costliest statements"""
+    with _lock:
+        labels = [f"<={int(bound)}ms" if bound != float('inf') else f">{int(LATENCY_BUCKETS_MS[-2])}ms"
+                  for bound in LATENCY_BUCKETS_MS]
+        statements = sorted(_statements.values(), key=lambda s: s['total_ms'], reverse=True)[:top]
+        total = sum(s['count'] for s in _statements.values())
+        total_ms = sum(s['total_ms'] for s in _statements.values())
+        return {
+            'queries': total,
+            'total_ms': total_ms,
+            'avg_ms': total_ms / total if total else 0.0,
+            'histogram': dict(zip(labels, _histogram)),
+            'top_statements': [
+                {**s, 'avg_ms': s['total_ms'] / s['count'], 'call_sites': dict(s['call_sites'])}
+                for s in statements
+            ],
+        }
+
+def reset():
+    """Clear all collected stats"""
+    with _lock:
+        for i in range(len(_histogram)):
+            _histogram[i] = 0
+        _statements.clear()
+        _scopes.clear()
+        _sessions.clear()
@@ -0,0 +1,219 @@
+import bisect
+import heapq
+import math
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select
+from database import PrayerRequest
+
+# Relative weight of each prayer type (first word, lower-cased)
+TYPE_WEIGHTS = {'critical': 3.0, 'emergency': 2.0}
+DEFAULT_TYPE_WEIGHT = 1.0
+HALF_LIFE = 12 * 3600  # seconds for a request's score to halve
+COUNT_EXPONENT = 0.5  # how strongly existing prayers push a request down
+
+FEED_CAPACITY = 1000  # requests kept ranked in memory
+REBUILD_INTERVAL = 300  # seconds; picks up writes made by other processes
+
+def priority(prayer_type, urgency_level=5, prayer_count=0):
+    """Time-independent part of the score: type and urgency up, prayers already received down"""
+    kind = (prayer_type or '').split()[0].lower() if (prayer_type or '').strip() else ''
+    weight = TYPE_WEIGHTS.get(kind, DEFAULT_TYPE_WEIGHT)
+    return weight * (1 + (urgency_level or 0) / 10) / (1 + max(prayer_count or 0, 0)) ** COUNT_EXPONENT
+
+def rank_key(prayer_type, urgency_level, prayer_count, created_at):
+    """Log-score with exponential age decay folded in
+
+    ``priority * 0.5 ** (age / HALF_LIFE)`` decays at the same rate for every
+    request, so its log can be written as ``log(priority) + created / tau``
+    minus a term that only depends on "now". Ordering by this key is the hot
+    ordering at any moment and never needs re-sorting as time passes.
+    """
+    created = (created_at or datetime.utcnow()).timestamp()
+    return math.log(priority(prayer_type, urgency_level, prayer_count)) + created * math.log(2) / HALF_LIFE
+
+def hot_score(key, now=None):
+    """Current decayed score for a rank key"""
+    now = (now or datetime.utcnow()).timestamp()
+    return math.exp(key - now * math.log(2) / HALF_LIFE)
+
+def encode_cursor(key, prayer_id):
+    return f"{key!r}|{prayer_id}"
+
+def decode_cursor(cursor):
+    key, prayer_id = cursor.rsplit('|', 1)
+    return float(key), int(prayer_id)
+
+class HotFeed:
+    """Top-N open prayer requests kept in rank order and updated incrementally
+
+    The ranked set is built once by streaming the table through a bounded
+    heap, then maintained from write events: new requests are inserted,
+    responses lower a member's key and answered requests are removed.
+    ``_floor`` is the best key known to exist outside the set, so every
+    member (all keys >= floor) is exactly ordered; when evictions shrink
+    the set below half its capacity, or ``rebuild_interval`` passes, it is
+    rebuilt from the database. Pages past the in-memory set are ranked by
+    streaming the table again (see ``_scan_below``).
+    """
+
+    def __init__(self, engine, capacity=FEED_CAPACITY, rebuild_interval=REBUILD_INTERVAL, chunk_size=5000):
+        self.engine = engine
+        self.capacity = capacity
+        self.rebuild_interval = rebuild_interval
+        self.chunk_size = chunk_size
+        self._order = []  # (key, prayer_id), ascending
+        self._entries = {}  # prayer_id -> [key, prayer_type, urgency_level, prayer_count, created_at]
+        self._floor = float('-inf')
+        self._built_at = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def _iter_open(self):
+        """Stream (key, prayer_id, prayer_type, urgency_level, prayer_count, created_at) for open requests"""
+        query = select(
+            PrayerRequest.id, PrayerRequest.prayer_type, PrayerRequest.urgency_level,
+            PrayerRequest.prayer_count, PrayerRequest.created_at,
+        ).where(PrayerRequest.status != 'answered')
+        with self.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=self.chunk_size).execute(query)
+            for prayer_id, prayer_type, urgency_level, prayer_count, created_at in result:
+                key = rank_key(prayer_type, urgency_level, prayer_count, created_at)
+                yield key, prayer_id, prayer_type, urgency_level, prayer_count, created_at
+
+    def rebuild(self):
+        """Rank every open request, keeping only the best ``capacity``"""
+        with self._rebuild_lock:
+            heap = []
+            floor = float('-inf')
+            for item in self._iter_open():
+                if len(heap) < self.capacity:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    floor = max(floor, heapq.heapreplace(heap, item)[0])
+                else:
+                    floor = max(floor, item[0])
+
+            with self._lock:
+                self._entries = {item[1]: list(item[:1] + item[2:]) for item in heap}
+                self._order = sorted(item[:2] for item in heap)
+                self._floor = floor
+                self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        stale = (
+            self._built_at is None
+            or time.monotonic() - self._built_at > self.rebuild_interval
+            or (self._floor > float('-inf') and len(self._order) < self.capacity // 2)
+        )
+        if stale:
+            self.rebuild()
+
+    def _insert(self, prayer_id, entry):
+        """Place one entry (lock held), evicting the lowest past capacity"""
+        if entry[0] < self._floor:
+            return
+        self._entries[prayer_id] = entry
+        bisect.insort(self._order, (entry[0], prayer_id))
+        if len(self._order) > self.capacity:
+            key, evicted_id = self._order.pop(0)
+            del self._entries[evicted_id]
+            self._floor = max(self._floor, key)
+
+    def _discard(self, prayer_id):
+        """Drop one entry (lock held); returns it or None"""
+        entry = self._entries.pop(prayer_id, None)
+        if entry is not None:
+            index = bisect.bisect_left(self._order, (entry[0], prayer_id))
+            del self._order[index]
+        return entry
+
+    def add(self, prayer_id, prayer_type, urgency_level=5, prayer_count=0, created_at=None):
+        """A new open request was committed"""
+        created_at = created_at or datetime.utcnow()
+        key = rank_key(prayer_type, urgency_level, prayer_count, created_at)
+        with self._lock:
+            if self._built_at is not None:
+                self._insert(prayer_id, [key, prayer_type, urgency_level, prayer_count, created_at])
+
+    def bump(self, counts):
+        """Responses were committed; ``counts`` maps prayer_id -> new prayers"""
+        with self._lock:
+            for prayer_id, amount in counts.items():
+                entry = self._discard(prayer_id)
+                if entry is None:
+                    continue  # outside the set; its key only went down
+                entry[3] = (entry[3] or 0) + amount
+                entry[0] = rank_key(entry[1], entry[2], entry[3], entry[4])
+                if entry[0] < self._floor:
+                    continue  # unseen requests may now outrank it
+                self._insert(prayer_id, entry)
+
+    def remove(self, prayer_id):
+        """The request left the feed (answered or deleted)"""
+        with self._lock:
+            self._discard(prayer_id)
+
+    def _scan_below(self, boundary, count):
+        """The best ``count`` (key, prayer_id) pairs ranked below ``boundary``, best first
+
+        Used once a page runs past the in-memory set: the key is computed,
+        not stored, so this streams every open request through a heap of
+        ``count`` items. Only deep pages pay for it.
+        """
+        heap = []
+        for item in self._iter_open():
+            pair = item[:2]
+            if pair >= boundary:
+                continue
+            if len(heap) < count:
+                heapq.heappush(heap, pair)
+            elif pair > heap[0]:
+                heapq.heapreplace(heap, pair)
+        return sorted(heap, reverse=True)
+
+    def page(self, limit=20, cursor=None):
+        """``limit`` (key, prayer_id) pairs after ``cursor``, best first, and the next cursor
+
+        Served from memory while the page lies within the ranked set; past
+        its floor the rest of the page comes from the database.
+        """
+        self._ensure_fresh()
+        position = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            end = len(self._order)
+            if position:
+                end = bisect.bisect_left(self._order, position)
+            start = max(end - limit, 0)
+            ranked = self._order[start:end][::-1]
+            exhausted = self._floor == float('-inf')  # nothing exists outside the set
+        if start > 0:
+            return ranked, encode_cursor(*ranked[-1])
+        if exhausted:
+            return ranked, None
+
+        # Memory ran out mid-page: continue below the last pair shown
+        remaining = limit - len(ranked)
+        if not remaining:
+            return ranked, encode_cursor(*ranked[-1])  # a finite floor means more exist below
+        boundary = ranked[-1] if ranked else position or (float('inf'), 0)
+        more = self._scan_below(boundary, remaining + 1)
+        ranked += more[:remaining]
+        next_cursor = encode_cursor(*ranked[-1]) if ranked and len(more) > remaining else None
+        return ranked, next_cursor
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+def get_hot_feed(engine):
+    """The shared ranked feed for an engine, created on first use"""
+    with _feeds_lock:
+        feed = _feeds.get(id(engine))
+        if feed is None:
+            feed = _feeds[id(engine)] = HotFeed(engine)
+        return feed
+
+def loaded_feed(engine):
+    """The engine's feed if one has been built, for forwarding write events"""
+    return _feeds.get(id(engine))
@@ -0,0 +1,82 @@
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, func, tuple_
+from database import Notification, NotificationArchive, PrayerResponseArchive
+
+# name -> (table, extra condition, default max age in days, archive table or None)
+RETENTION_POLICIES = {
+    'notifications': (
+        Notification.__table__, Notification.__table__.c.is_read.is_(True), 90, NotificationArchive.__table__,
+    ),
+    # Responses of archived prayers; the prayer keeps its prayer_count
+    'prayer_responses_archive': (PrayerResponseArchive.__table__, None, 3 * 365, None),
+}
+
+def _expired(table, condition, cutoff):
+    criteria = [table.c.created_at < cutoff]
+    if condition is not None:
+        criteria.append(condition)
+    return criteria
+
+def _policies(policies, max_age_days):
+    """(name, table, criteria, archive table) for the selected policies"""
+    now = datetime.utcnow()
+    for name in policies or RETENTION_POLICIES:
+        table, condition, default_days, archive_table = RETENTION_POLICIES[name]
+        days = (max_age_days or {}).get(name, default_days)
+        yield name, table, _expired(table, condition, now - timedelta(days=days)), archive_table
+
+def retention_report(engine, policies=None, max_age_days=None, batch_size=500, archive=True):
+    """Dry run: rows (and batches) each policy would touch, without changing anything"""
+    report = {}
+    with engine.connect() as connection:
+        for name, table, criteria, archive_table in _policies(policies, max_age_days):
+            rows = connection.execute(select(func.count()).select_from(table).where(*criteria)).scalar()
+            report[name] = {
+                'rows': rows,
+                'batches': -(-rows // batch_size),
+                'action': 'archive' if archive and archive_table is not None else 'delete',
+            }
+    return report
+
+def purge_expired(engine, policies=None, max_age_days=None, archive=True, batch_size=500,
+                  pause=0.05, max_batches=None, throttle=None):
+    """Delete (or archive) expired rows in small keyset-ordered batches
+
+    Each batch is its own short transaction over at most ``batch_size`` rows,
+    walked in (created_at, id) order so no batch rescans what an earlier one
+    removed. Between batches the job sleeps ``pause`` seconds and calls
+    ``throttle()`` (e.g. to wait out replica lag). ``max_age_days`` overrides
+    the per-policy age; ``archive=False`` deletes even where an archive
+    table exists. Returns rows and batches per policy.
+    """
+    result = {}
+    for name, table, criteria, archive_table in _policies(policies, max_age_days):
+        if not archive:
+            archive_table = None
+        stats = result[name] = {'rows': 0, 'batches': 0}
+        position = None
+        while max_batches is None or stats['batches'] < max_batches:
+            with engine.begin() as connection:
+                query = select(table.c.created_at, table.c.id).where(*criteria)
+                if position:
+                    query = query.where(tuple_(table.c.created_at, table.c.id) > tuple_(*position))
+                batch = connection.execute(
+                    query.order_by(table.c.created_at, table.c.id).limit(batch_size)
+                ).all()
+                if not batch:
+                    break
+                ids = [row_id for _, row_id in batch]
+                if archive_table is not None:
+                    columns = [c.name for c in archive_table.columns]
+                    connection.execute(insert(archive_table).from_select(
+                        columns, select(*[table.c[n] for n in columns]).where(table.c.id.in_(ids))
+                    ))
+                stats['rows'] += connection.execute(delete(table).where(table.c.id.in_(ids))).rowcount
+            stats['batches'] += 1
+            position = tuple(batch[-1])
+            if pause:
+                time.sleep(pause)
+            if throttle:
+                throttle()
+    return result
@@ -0,0 +1,136 @@
+import threading
+import weakref
+from sqlalchemy import text
+from database import PrayerRequest, BlogPost
+
+# entity type -> (model, title column, body column)
+SEARCH_TARGETS = {
+    'prayer': (PrayerRequest, 'title', 'description'),
+    'blog': (BlogPost, 'title', 'content'),
+}
+
+TEXT_SEARCH_CONFIG = 'english'
+
+_ready_engines = weakref.WeakSet()
+_ready_lock = threading.Lock()
+
+def _pg_document(model, title, body):
+    """tsvector expression; must match the GIN index expression exactly"""
+    return (
+        f"to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce({model.__tablename__}.{title}, '') "
+        f"|| ' ' || coalesce({model.__tablename__}.{body}, ''))"
+    )
+
+def _fts_table(model):
+    return f"{model.__tablename__}_fts"
+
+def _postgres_ddl(model, title, body):
+    table = model.__tablename__
+    document = _pg_document(model, title, body).replace(f"{table}.", '')
+    # CONCURRENTLY: writes to the table continue while the index builds
+    return [f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_fts ON {table} USING GIN ({document})"]
+
+def _sqlite_ddl(model, title, body):
+    """External-content FTS5 table kept current by triggers"""
+    table = model.__tablename__
+    fts = _fts_table(model)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{title}, {body}, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {title}, {body}) VALUES (new.id, new.{title}, new.{body}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {title}, {body}) VALUES ('delete', old.id, old.{title}, old.{body}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {title}, {body} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {title}, {body}) VALUES ('delete', old.id, old.{title}, old.{body}); "
+        f"INSERT INTO {fts}(rowid, {title}, {body}) VALUES (new.id, new.{title}, new.{body}); END",
+    ]
+
+def ensure_search_indexes(engine):
+    """Create the dialect's full-text indexes once per engine
+
+    Part of the schema bootstrap (database.get_engine), not of a search
+    request: building a GIN index over an existing table takes a while.
+    """
+    if engine in _ready_engines:
+        return
+    with _ready_lock:
+        if engine in _ready_engines:
+            return
+        dialect = engine.dialect.name
+        if dialect == 'postgresql':
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+            with engine.connect() as connection:
+                connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+                for model, title, body in SEARCH_TARGETS.values():
+                    for statement in _postgres_ddl(model, title, body):
+                        connection.execute(text(statement))
+        elif dialect == 'sqlite':
+            with engine.begin() as connection:
+                for model, title, body in SEARCH_TARGETS.values():
+                    fts = _fts_table(model)
+                    exists = connection.execute(
+                        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                        {'name': fts}
+                    ).first()
+                    for statement in _sqlite_ddl(model, title, body):
+                        connection.execute(text(statement))
+                    if not exists:
+                        # Index rows that predate the FTS table
+                        connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        _ready_engines.add(engine)
+
+def _fts5_query(query_text):
+    """Quote each term so user input cannot inject FTS5 syntax"""
+    terms = query_text.split()
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def search(engine, query_text, entity_type='prayer', limit=20, offset=0, ensure_indexes=False):
+    """Ranked full-text search over prayers or blog posts
+
+    Returns ``[{'id', 'title', 'rank'}, ...]`` best match first. Uses a
+    tsvector GIN index on PostgreSQL, an FTS5 shadow table on SQLite and a
+    LIKE scan elsewhere. The indexes are created with the schema; pass
+    ``ensure_indexes=True`` for an engine that was not bootstrapped by
+    get_engine() (never for a read-only replica).
+    """
+    model, title, body = SEARCH_TARGETS[entity_type]
+    if not query_text or not query_text.strip():
+        return []
+    if ensure_indexes:
+        ensure_search_indexes(engine)
+    dialect = engine.dialect.name
+
+    table = model.__tablename__
+    # Unpublished blog posts never show up in search
+    published = f" AND {table}.is_published" if entity_type == 'blog' else ''
+    params = {'q': query_text, 'limit': limit, 'offset': offset}
+
+    if dialect == 'postgresql':
+        document = _pg_document(model, title, body)
+        statement = text(
+            f"SELECT {table}.id, {table}.{title}, ts_rank({document}, query) AS rank "
+            f"FROM {table}, websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', :q) AS query "
+            f"WHERE {document} @@ query{published} "
+            f"ORDER BY rank DESC, {table}.id DESC LIMIT :limit OFFSET :offset"
+        )
+    elif dialect == 'sqlite':
+        fts = _fts_table(model)
+        params['q'] = _fts5_query(query_text)
+        statement = text(
+            f"SELECT {table}.id, {table}.{title}, -bm25({fts}) AS rank "
+            f"FROM {fts} JOIN {table} ON {table}.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :q{published} "
+            f"ORDER BY bm25({fts}), {table}.id DESC LIMIT :limit OFFSET :offset"
+        )
+    else:
+        params['q'] = f"%{query_text.strip()}%"
+        statement = text(
+            f"SELECT {table}.id, {table}.{title}, 0 AS rank FROM {table} "
+            f"WHERE ({table}.{title} LIKE :q OR {table}.{body} LIKE :q){published} "
+            f"ORDER BY {table}.id DESC LIMIT :limit OFFSET :offset"
+        )
+
+    with engine.connect() as connection:
+        rows = connection.execute(statement, params).all()
+    return [{'id': row[0], 'title': row[1], 'rank': float(row[2] or 0)} for row in rows]
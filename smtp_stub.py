@@ -0,0 +1,131 @@
+"""Local SMTP stand-in for development and benchmarks
+
+Speaks enough SMTP for smtplib (EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA,
+RSET, NOOP, QUIT) and keeps received messages in memory. STARTTLS is not
+offered, so point the app at it with ``SMTP_STARTTLS = false``.
+
+    python smtp_stub.py --port 8025
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self._reply('220 localhost SMTP stand-in')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self._reply('250-localhost')
+                self._reply('250 AUTH PLAIN LOGIN')
+            elif verb == 'HELO':
+                self._reply('250 localhost')
+            elif verb == 'AUTH':
+                if command.upper().startswith('AUTH LOGIN'):
+                    self._reply('334 VXNlcm5hbWU6')
+                    self.rfile.readline()
+                    self._reply('334 UGFzc3dvcmQ6')
+                    self.rfile.readline()
+                server.logins += 1
+                self._reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                sender, recipients = command[10:].strip('<> '), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[8:].strip('<> '))
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                failure = server.take_failure()
+                if failure:
+                    self._reply(failure)
+                    continue
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b'..') else chunk)
+                if server.delay:
+                    time.sleep(server.delay)
+                with server.lock:
+                    server.messages.append({'from': sender, 'to': recipients, 'data': b''.join(data).decode()})
+                self._reply('250 OK queued')
+            elif verb in ('RSET', 'NOOP'):
+                sender, recipients = (None, []) if verb == 'RSET' else (sender, recipients)
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """In-process SMTP server recording messages; ``port=0`` picks a free port
+
+    ``fail_next(n, reply)`` makes the next ``n`` DATA commands fail with
+    ``reply`` (e.g. ``'451 Try again later'``) to exercise retries, and
+    ``delay`` adds per-message latency.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0):
+        super().__init__((host, port), _Handler)
+        self.delay = delay
+        self.messages = []
+        self.connections = 0
+        self.logins = 0
+        self.lock = threading.Lock()
+        self._failures = []
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def fail_next(self, count=1, reply='451 Temporary failure, try again later'):
+        with self.lock:
+            self._failures.extend([reply] * count)
+
+    def take_failure(self):
+        with self.lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='smtp-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    args = parser.parse_args()
+    server = LocalSMTPServer(args.host, args.port)
+    print(f"SMTP stand-in listening on {args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
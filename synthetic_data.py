@@ -0,0 +1,87 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from database import User, Notification, chunked
+
+PRAYER_TYPES = ['general', 'emergency', 'critical']
+STATUSES = ['pending', 'praying', 'answered']
+RESPONSE_TYPES = ['prayed', 'comment', 'amen']
+TAGS = ['Healing', 'Family', 'Peace', 'Work', 'Guidance', 'Anxiety', 'Finances', 'Travel', 'Grief', 'Thanks']
+WORDS = (
+    'pray peace healing strength family surgery hope guidance grace comfort job '
+    'interview recovery faith journey anxiety rest travel safety provision blessing'
+).split()
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def generate(db_manager, users=1000, prayers=10000, responses=50000, notifications=20000,
+             seed=42, days=365, chunk_size=5000):
+    """Fill a connected DatabaseManager with reproducible synthetic data
+
+    Rows are streamed through the bulk insert paths, so volumes in the
+    millions only hold ``chunk_size`` rows in memory at a time.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    def timestamp():
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+    engine = db_manager.engine
+    for chunk in chunked(range(1, users + 1), chunk_size):
+        with engine.begin() as connection:
+            connection.execute(insert(User), [{
+                'username': f"user{i}",
+                'email': f"user{i}@example.com",
+                'password_hash': 'synthetic$0',
+                'full_name': f"User {i}",
+                'is_active': True,
+                'is_verified': rng.random() < 0.8,
+                'created_at': timestamp(),
+                'prayer_count': 0,
+                'user_type': 'admin' if i == 1 else 'user',
+            } for i in chunk])
+
+    prayer_result = db_manager.add_prayer_requests_bulk((
+        {
+            'user_id': rng.randint(1, users) if users else None,
+            'prayer_type': rng.choices(PRAYER_TYPES, weights=[80, 12, 8])[0],
+            'title': _sentence(rng, 4),
+            'description': _sentence(rng, 25),
+            'urgency_level': rng.randint(1, 10),
+            'is_anonymous': rng.random() < 0.2,
+            'status': rng.choices(STATUSES, weights=[50, 30, 20])[0],
+            'tags': rng.sample(TAGS, rng.randint(0, 3)),
+            'created_at': timestamp(),
+        }
+        for _ in range(prayers)
+    ), chunk_size=chunk_size)
+    if not prayer_result['success']:
+        raise RuntimeError(prayer_result['error'])
+
+    response_result = db_manager.add_prayer_responses_bulk((
+        {
+            'prayer_id': rng.randint(1, prayers),
+            'user_id': rng.randint(1, users) if users else None,
+            'response_type': rng.choices(RESPONSE_TYPES, weights=[70, 15, 15])[0],
+            'comment': _sentence(rng, 8) if rng.random() < 0.15 else '',
+            'created_at': timestamp(),
+        }
+        for _ in range(responses if prayers else 0)
+    ), chunk_size=chunk_size)
+    if not response_result['success']:
+        raise RuntimeError(response_result['error'])
+
+    for chunk in chunked(range(notifications if users else 0), chunk_size):
+        with engine.begin() as connection:
+            connection.execute(insert(Notification), [{
+                'user_id': rng.randint(1, users),
+                'title': _sentence(rng, 3),
+                'message': _sentence(rng, 12),
+                'notification_type': rng.choice(['prayer_response', 'answered', 'system']),
+                'is_read': rng.random() < 0.7,
+                'created_at': timestamp(),
+            } for _ in chunk])
+
+    return {'users': users, 'prayers': prayers, 'responses': responses, 'notifications': notifications}
@@ -0,0 +1,23 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import pytest
+
+from database import DatabaseManager
+from smtp_stub import LocalSMTPServer
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """A connected DatabaseManager on a fresh SQLite file"""
+    db_manager = DatabaseManager('sqlite', sqlite_path=str(tmp_path / 'app.db'))
+    assert db_manager.connect(announce=False)
+    return db_manager
+
+@pytest.fixture
+def smtp_server():
+    with LocalSMTPServer() as server:
+        yield server
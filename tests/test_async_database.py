@@ -0,0 +1,62 @@
+"""AsyncDatabaseManager on in-memory SQLite, one engine per event loop"""
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import insert
+
+import async_database
+
+from async_database import AsyncDatabaseManager, dispose_async_engines
+from database import PrayerRequestArchive
+
+async def _round_trip():
+    db = AsyncDatabaseManager('sqlite', database_url='sqlite+aiosqlite://')
+    try:
+        assert await db.connect()
+        added = await db.add_prayer_request({'user_id': 1, 'prayer_type': 'general', 'title': 'Peace'})
+        assert added['success'], added
+        feed = await db.get_prayer_requests()
+        assert feed['success'], feed
+        return len(feed['data'])
+    finally:
+        await dispose_async_engines()
+
+def test_in_memory_schema_created_on_every_loop():
+    # Each asyncio.run() gets a new loop, engine and (empty) in-memory database
+    assert asyncio.run(_round_trip()) == 1
+    assert asyncio.run(_round_trip()) == 1
+
+def test_connect_fails_when_bootstrap_fails(monkeypatch):
+    def broken_create_all(*args, **kwargs):
+        raise RuntimeError("schema bootstrap failed")
+    monkeypatch.setattr(async_database.Base.metadata, 'create_all', broken_create_all)
+
+    async def go():
+        db = AsyncDatabaseManager('sqlite', database_url='sqlite+aiosqlite://')
+        try:
+            return await db.connect()
+        finally:
+            await dispose_async_engines()
+    assert asyncio.run(go()) is False
+
+def test_feed_includes_archived_rows_like_the_sync_feed():
+    async def go():
+        db = AsyncDatabaseManager('sqlite', database_url='sqlite+aiosqlite://')
+        try:
+            assert await db.connect()
+            await db.add_prayer_request({'prayer_type': 'general', 'title': 'Live'})
+            async with db.Session() as session:
+                await session.execute(insert(PrayerRequestArchive).values(
+                    id=100, title='Answered long ago', prayer_type='general', status='answered',
+                    created_at=datetime(2020, 1, 1),
+                ))
+                await session.commit()
+            everything = await db.get_prayer_requests({'include_archived': True})
+            since_2019 = await db.get_prayer_requests({'date_from': datetime(2019, 1, 1)})
+            live_only = await db.get_prayer_requests()
+            return [[row['title'] for row in feed['data']] for feed in (everything, since_2019, live_only)]
+        finally:
+            await dispose_async_engines()
+    everything, since_2019, live_only = asyncio.run(go())
+    assert everything == since_2019 == ['Live', 'Answered long ago']
+    assert live_only == ['Live']
@@ -0,0 +1,45 @@
+"""AuthSystem reads after its own writes, and registration matches login's lookup"""
+import sqlite3
+
+import pytest
+from sqlalchemy import insert
+
+from auth_system import AuthSystem
+from database import DatabaseManager, User, user_profile_cache
+from password_hashing import PasswordHasher
+
+def make_auth(db_manager):
+    # Skip __init__: it reads Streamlit secrets and session state
+    auth = AuthSystem.__new__(AuthSystem)
+    auth.db_manager = db_manager
+    auth.password_hasher = PasswordHasher('pbkdf2-sha256', cost=1000)
+    return auth
+
+@pytest.fixture
+def replicated(db_manager, tmp_path):
+    """An AuthSystem whose reads go to a replica that stopped replicating after the signup"""
+    with db_manager.engine.begin() as connection:
+        user_id = connection.execute(insert(User).values(
+            username='ruth', email='ruth@example.com', full_name='Ruth', is_active=True,
+        )).inserted_primary_key[0]
+    replica = tmp_path / 'replica.db'
+    source, target = sqlite3.connect(tmp_path / 'app.db'), sqlite3.connect(replica)
+    source.backup(target)
+    source.close()
+    target.close()
+    manager = DatabaseManager('sqlite', sqlite_path=str(tmp_path / 'app.db'), replica_dsns=[f"sqlite:///{replica}"])
+    assert manager.connect(announce=False)
+    user_profile_cache.invalidate(user_id)
+    return make_auth(manager), user_id
+
+def test_profile_edit_is_read_back_from_the_primary(replicated):
+    auth, user_id = replicated
+    assert auth.get_user_profile(user_id)['user']['full_name'] == 'Ruth'  # served by the replica
+    assert auth.update_user_profile(user_id, {'full_name': 'Ruth of Moab'})['success']
+    assert auth.get_user_profile(user_id)['user']['full_name'] == 'Ruth of Moab'
+
+def test_username_with_at_sign_is_rejected(db_manager):
+    result = make_auth(db_manager).register_user(
+        {'username': 'a@b', 'email': 'ab@example.com', 'password': 'Password123'}
+    )
+    assert result == {'success': False, 'error': "Username cannot contain '@'"}
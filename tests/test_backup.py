@@ -0,0 +1,38 @@
+"""Restoring backups: archive partitions and zstd-compressed files"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+import backup
+from database import PrayerRequest
+
+def test_restore_creates_archive_partitions_before_inserting(db_manager, tmp_path, monkeypatch):
+    db_manager.add_prayer_requests_bulk(
+        {'title': f"Prayer {i}", 'prayer_type': 'general', 'created_at': datetime(2024, month, 15)}
+        for i, month in enumerate((1, 3, 5, 6))
+    )
+    with db_manager.engine.begin() as connection:
+        connection.execute(update(PrayerRequest).where(PrayerRequest.id <= 3)
+                           .values(status='answered', answered_at=datetime(2024, 7, 1)))
+    assert db_manager.archive_answered()['success']
+    backups = str(tmp_path / 'backups')
+    backup.backup_database(db_manager.engine, backups)
+
+    calls = []
+    original = backup.ensure_partitions
+    def record(connection, table, start, end):
+        calls.append((table.name, start, end, connection.execute(table.select()).first() is None))
+        original(connection, table, start, end)
+    monkeypatch.setattr(backup, 'ensure_partitions', record)
+    assert backup.restore_database(db_manager.engine, backups)['prayer_requests_archive'] == 3
+    # Called with the restored rows' range while the archive table was still empty
+    assert calls == [('prayer_requests_archive', datetime(2024, 1, 15), datetime(2024, 5, 15), True)]
+
+def test_zstd_backup_round_trip(db_manager, tmp_path):
+    pytest.importorskip('zstandard')
+    db_manager.add_prayer_requests_bulk({'title': f"Prayer {i}", 'prayer_type': 'general'} for i in range(5))
+    backups = str(tmp_path / 'backups')
+    manifest = backup.backup_database(db_manager.engine, backups, compression='zstd')
+    assert manifest['tables']['prayer_requests']['file'] == 'prayer_requests.jsonl.zst'
+    assert backup.restore_database(db_manager.engine, backups)['prayer_requests'] == 5
@@ -0,0 +1,8 @@
+"""Smoke test: the data-layer benchmark imports and completes one tiny run on SQLite"""
+import bench_data_layer
+
+def test_bench_data_layer_tiny_scale(tmp_path):
+    run = bench_data_layer.run_scale(50, 1, str(tmp_path))
+    assert run['prayers'] == 50
+    assert set(run['ops']) >= {'get_prayer_requests', 'get_dashboard_stats', 'export_csv_gzip'}
+    assert all(timing['median_s'] >= 0 for timing in run['ops'].values())
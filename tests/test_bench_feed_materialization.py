@@ -0,0 +1,12 @@
+"""Smoke test: the feed materialization benchmark imports and completes one tiny run"""
+import json
+import sys
+
+import bench_feed_materialization
+
+def test_bench_feed_materialization_tiny_run(monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['bench_feed_materialization', '--rows', '50', '--limit', '20', '--repeat', '1'])
+    bench_feed_materialization.main()
+    report = json.loads(capsys.readouterr().out)
+    assert report['rows'] == 20
+    assert set(report['results']) >= {'orm_full_rows', 'core_ui_projection_columnar'}
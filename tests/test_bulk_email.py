@@ -0,0 +1,128 @@
+"""Bulk email jobs against the local SMTP stand-in"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import insert, select
+
+import bulk_email
+from database import User
+
+@pytest.fixture
+def engine(db_manager):
+    with db_manager.engine.begin() as connection:
+        connection.execute(insert(User), [
+            {'username': f"member{i}", 'email': f"member{i}@example.com", 'full_name': f"Member {i}",
+             'is_active': True, 'user_type': 'user'}
+            for i in range(40)
+        ])
+    return db_manager.engine
+
+class FakeOutbox:
+    def __init__(self):
+        self.wakes = 0
+
+    def wake(self):
+        self.wakes += 1
+
+@pytest.fixture(autouse=True)
+def outbox(monkeypatch):
+    fake = FakeOutbox()
+    monkeypatch.setattr(bulk_email, 'start_outbox_worker', lambda engine: fake)
+    return fake
+
+def config(server):
+    return {'host': '127.0.0.1', 'port': server.port, 'username': 'app', 'password': 'secret',
+            'sender': 'noreply@example.com', 'starttls': False, 'rate': None}
+
+def job_row(engine, job_id):
+    with engine.connect() as connection:
+        return connection.execute(select(bulk_email.jobs).where(bulk_email.jobs.c.id == job_id)).mappings().one()
+
+def test_job_sends_every_recipient_over_pooled_sessions(engine, smtp_server):
+    job_id = bulk_email.create_job(engine, 'Hello $full_name', '<p>Dear $full_name</p>')
+    sender = bulk_email.BulkEmailSender(engine, config(smtp_server), connections=2, chunk_size=10)
+    assert sender.run(job_id) == 'completed'
+
+    row = job_row(engine, job_id)
+    assert (row['status'], row['sent_count'], row['last_user_id'], row['runner_token']) == ('completed', 40, 40, None)
+    assert len(smtp_server.messages) == 40
+    assert smtp_server.connections == 2
+    assert any('Subject: Hello Member 7\r\n' in message['data'] for message in smtp_server.messages)
+
+def test_resume_during_a_chunk_keeps_the_runner_going(engine, smtp_server):
+    job_id = bulk_email.create_job(engine, 'Hi', 'Body')
+    sender = bulk_email.BulkEmailSender(engine, config(smtp_server), connections=2, chunk_size=10)
+    send_chunk = sender._send_chunk
+    calls = []
+
+    def pause_and_resume(*args):
+        if not calls:
+            bulk_email.set_job_status(engine, job_id, 'paused')
+            bulk_email.set_job_status(engine, job_id, 'pending')
+        calls.append(1)
+        return send_chunk(*args)
+
+    sender._send_chunk = pause_and_resume
+    assert sender.run(job_id) == 'completed'
+    assert job_row(engine, job_id)['sent_count'] == 40
+    assert len(calls) == 4
+
+def test_resume_while_runner_winds_down_is_picked_up(engine, smtp_server, monkeypatch):
+    job_id = bulk_email.create_job(engine, 'Hi', 'Body')
+    checkpoint, release = bulk_email.BulkEmailSender._checkpoint, bulk_email.BulkEmailSender._release
+    resumed = []
+
+    def pause_at_first_checkpoint(self, *args):
+        if not resumed:
+            bulk_email.set_job_status(engine, job_id, 'paused')
+        return checkpoint(self, *args)
+
+    def resume_before_release(self, *args, **kwargs):
+        if not resumed:
+            # The runner has seen 'paused'; the admin resumes before it lets go
+            bulk_email.set_job_status(engine, job_id, 'pending')
+            resumed.append(bulk_email.start_job(engine, job_id) is threading.current_thread())
+        return release(self, *args, **kwargs)
+
+    monkeypatch.setattr(bulk_email.BulkEmailSender, '_checkpoint', pause_at_first_checkpoint)
+    monkeypatch.setattr(bulk_email.BulkEmailSender, '_release', resume_before_release)
+    bulk_email.start_job(engine, job_id, config=config(smtp_server), connections=2, chunk_size=10).join(10)
+    assert resumed == [True]  # the winding-down runner was reused, not a second one started
+    assert job_row(engine, job_id)['status'] == 'completed'
+    assert len(smtp_server.messages) == 40
+
+def test_pause_releases_the_job_and_wakes_the_outbox(engine, smtp_server, outbox):
+    job_id = bulk_email.create_job(engine, 'Hi', 'Body')
+    smtp_server.fail_next(1)
+    sender = bulk_email.BulkEmailSender(engine, config(smtp_server), connections=1, chunk_size=10)
+    checkpoint = sender._checkpoint
+
+    def pause(*args):
+        bulk_email.set_job_status(engine, job_id, 'paused')
+        return checkpoint(*args)
+
+    sender._checkpoint = pause
+    assert sender.run(job_id) == 'paused'
+    row = job_row(engine, job_id)
+    assert (row['status'], row['last_user_id'], row['retried_count'], row['runner_token']) == ('paused', 10, 1, None)
+    assert outbox.wakes == 1  # the 451 handed to the outbox goes out without waiting for a poll
+
+def test_heartbeat_keeps_a_slow_chunk_from_being_taken_over(engine, smtp_server, monkeypatch):
+    monkeypatch.setattr(bulk_email, 'STALE_AFTER', 0.3)
+    smtp_server.delay = 0.05
+    job_id = bulk_email.create_job(engine, 'Hi', 'Body')
+    sender = bulk_email.BulkEmailSender(engine, config(smtp_server), connections=1, chunk_size=40,
+                                        heartbeat_interval=0.05)
+    runner = threading.Thread(target=sender.run, args=(job_id,))
+    runner.start()
+    time.sleep(0.2)
+    beat = job_row(engine, job_id)['updated_at']
+    time.sleep(0.5)  # well past STALE_AFTER, still inside the single 2 s chunk
+    assert job_row(engine, job_id)['updated_at'] > beat
+    assert bulk_email.resume_jobs(engine, config=config(smtp_server)) == []
+    other = bulk_email.BulkEmailSender(engine, config(smtp_server))
+    assert other.run(job_id) is None
+    runner.join(10)
+    assert len(smtp_server.messages) == 40
+    assert job_row(engine, job_id)['status'] == 'completed'
@@ -0,0 +1,72 @@
+"""OutboxWorker delivering to the local SMTP stand-in"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+import email_outbox
+
+@pytest.fixture
+def engine(db_manager):
+    return db_manager.engine
+
+def make_worker(engine, server, **options):
+    config = {'host': '127.0.0.1', 'port': server.port, 'username': 'app', 'password': 'secret',
+              'sender': 'noreply@example.com', 'starttls': False, 'rate': None}
+    return email_outbox.OutboxWorker(engine, config, start=False, **options)
+
+def outbox_row(engine, message_id):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(email_outbox.outbox).where(email_outbox.outbox.c.id == message_id)
+        ).mappings().one()
+
+def test_transient_failure_is_retried_with_backoff(engine, smtp_server):
+    message_id = email_outbox.enqueue_email(engine, 'ruth@example.com', 'Hello', '<p>Hi</p>', start_worker=False)
+    worker = make_worker(engine, smtp_server)
+    smtp_server.fail_next(1, '451 Try again later')
+
+    before = datetime.utcnow()
+    assert worker.process_batch() == 0
+    row = outbox_row(engine, message_id)
+    assert row['status'] == 'pending'
+    assert row['attempts'] == 1
+    assert '451' in row['last_error']
+    assert row['next_attempt_at'] >= before + timedelta(seconds=email_outbox.RETRY_BASE / 2)
+
+    # Not due yet: nothing is claimed
+    assert worker.process_batch() == 0
+    assert outbox_row(engine, message_id)['attempts'] == 1
+
+    with engine.begin() as connection:
+        connection.execute(update(email_outbox.outbox).values(next_attempt_at=datetime.utcnow()))
+    assert worker.process_batch() == 1
+    row = outbox_row(engine, message_id)
+    assert row['status'] == 'sent'
+    assert row['attempts'] == 2
+    assert [message['to'] for message in smtp_server.messages] == [['ruth@example.com']]
+
+def test_permanent_failure_marks_message_failed(engine, smtp_server):
+    message_id = email_outbox.enqueue_email(engine, 'nobody@example.com', 'Hello', 'Hi', 'plain',
+                                            start_worker=False)
+    worker = make_worker(engine, smtp_server)
+    smtp_server.fail_next(1, '550 No such user')
+
+    assert worker.process_batch() == 0
+    row = outbox_row(engine, message_id)
+    assert row['status'] == 'failed'
+    assert row['attempts'] == 1
+    assert '550' in row['last_error']
+    assert smtp_server.messages == []
+
+def test_batch_reuses_one_smtp_session(engine, smtp_server):
+    for i in range(20):
+        email_outbox.enqueue_email(engine, f"member{i}@example.com", 'Weekly prayers', 'Hi', start_worker=False)
+    worker = make_worker(engine, smtp_server, batch_size=50)
+
+    assert worker.process_batch() == 20
+    assert len(smtp_server.messages) == 20
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+    assert email_outbox.outbox_stats(engine) == {'sent': 20}
+    worker.connection.close()
@@ -0,0 +1,49 @@
+"""TokenVerifier revocation: verified tokens only, pruned once expired"""
+import time
+
+import jwt
+
+from jwt_tokens import TokenVerifier
+
+SECRET = 'first-secret-of-at-least-32-bytes'
+
+def make_verifier():
+    return TokenVerifier({'k1': SECRET}, 'k1')
+
+def test_revoked_token_is_denied():
+    verifier = make_verifier()
+    token = verifier.sign({'user_id': 1, 'exp': time.time() + 60})
+    assert verifier.verify(token)['success']
+    assert verifier.revoke(token)
+    assert verifier.verify(token) == {'success': False, 'error': 'Token revoked'}
+
+def test_forged_tokens_cannot_grow_the_deny_list():
+    verifier = make_verifier()
+    for i in range(100):
+        forged = jwt.encode({'jti': f"forged-{i}", 'exp': time.time() + 3600}, 'wrong-secret-of-at-least-32-bytes',
+                            algorithm='HS256', headers={'kid': 'k1'})
+        assert not verifier.revoke(forged)
+    unknown_kid = jwt.encode({'jti': 'x', 'exp': time.time() + 3600}, SECRET,
+                             algorithm='HS256', headers={'kid': 'k9'})
+    assert not verifier.revoke(unknown_kid)
+    assert verifier._revoked == {}
+
+def test_expired_revocations_are_pruned_without_being_presented_again():
+    verifier = make_verifier()
+    # PyJWT compares whole seconds, so give the short-lived tokens a full second or two
+    soon = int(time.time()) + 2
+    for i in range(50):
+        assert verifier.revoke(verifier.sign({'user_id': i, 'exp': soon}))
+    live = verifier.sign({'user_id': 99, 'exp': time.time() + 60})
+    assert len(verifier._revoked) == 50
+    time.sleep(soon - time.time() + 0.1)
+    assert verifier.revoke(live)
+    assert list(verifier._revoked.values()) == [jwt.decode(live, options={'verify_signature': False})['exp']]
+    assert len(verifier._revoked_by_exp) == 1
+
+def test_missing_or_malformed_token_is_invalid():
+    verifier = make_verifier()
+    for token in (None, 42, '', 'not.a.token'):
+        assert verifier.verify(token) == {'success': False, 'error': 'Invalid token'}
+        assert not verifier.revoke(token)
+    assert verifier.verify(verifier.sign({'user_id': 1}).encode())['success']
@@ -0,0 +1,66 @@
+"""Password reset tokens: stored hashed, single use, expiring"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select, update
+
+import email_outbox
+from auth_system import AuthSystem, reset_token_hash
+from database import PasswordResetToken, User
+from password_hashing import PasswordHasher
+
+@pytest.fixture
+def auth(db_manager):
+    # Skip __init__: it reads Streamlit secrets and session state
+    auth = AuthSystem.__new__(AuthSystem)
+    auth.db_manager = db_manager
+    auth.password_hasher = PasswordHasher('pbkdf2-sha256', cost=1000)
+    auth.app_url = 'https://app.example.com'
+    with db_manager.engine.begin() as connection:
+        connection.execute(insert(User).values(
+            username='ruth', email='ruth@example.com', full_name='Ruth',
+            password_hash=auth.hash_password('OldPassword1'), is_active=True,
+        ))
+    return auth
+
+def emailed_token(auth):
+    with auth.db_manager.engine.connect() as connection:
+        body = connection.execute(select(email_outbox.outbox.c.body)).scalars().all()[-1]
+    return re.search(r'reset_token=([\w-]+)', body).group(1)
+
+def stored_password(auth):
+    with auth.db_manager.engine.connect() as connection:
+        return connection.execute(select(User.password_hash)).scalar()
+
+def test_reset_link_sets_password_once(auth, monkeypatch):
+    monkeypatch.setattr(email_outbox, 'start_outbox_worker', lambda engine: None)
+    assert auth.reset_password('RUTH@example.com')['success']
+    token = emailed_token(auth)
+    with auth.db_manager.engine.connect() as connection:
+        hashes = connection.execute(select(PasswordResetToken.token_hash)).scalars().all()
+    assert hashes == [reset_token_hash(token)]  # the token itself is never stored
+
+    assert auth.confirm_password_reset(token, 'NewPassword1')['success']
+    assert auth.password_hasher.verify('NewPassword1', stored_password(auth))[0]
+    assert not auth.confirm_password_reset(token, 'Another1Pass')['success']
+
+def test_expired_or_unknown_token_is_rejected(auth, monkeypatch):
+    monkeypatch.setattr(email_outbox, 'start_outbox_worker', lambda engine: None)
+    auth.reset_password('ruth')
+    token = emailed_token(auth)
+    with auth.db_manager.engine.begin() as connection:
+        connection.execute(update(PasswordResetToken).values(expires_at=datetime.utcnow() - timedelta(minutes=1)))
+
+    before = stored_password(auth)
+    assert not auth.confirm_password_reset(token, 'NewPassword1')['success']
+    assert not auth.confirm_password_reset('not-a-token', 'NewPassword1')['success']
+    assert stored_password(auth) == before
+
+def test_unknown_account_gets_same_answer_and_no_email(auth, monkeypatch):
+    monkeypatch.setattr(email_outbox, 'start_outbox_worker', lambda engine: None)
+    unknown = auth.reset_password('nobody@example.com')
+    assert unknown == {'success': True, 'message': auth.reset_password('ruth@example.com')['message']}
+    with auth.db_manager.engine.connect() as connection:
+        recipients = connection.execute(select(email_outbox.outbox.c.recipient)).scalars().all()
+    assert recipients == ['ruth@example.com']
@@ -0,0 +1,37 @@
+"""query_stats timing hooks: statements that raise are recorded, not leaked"""
+import gc
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import query_stats
+
+def test_failed_statement_is_recorded_and_released():
+    engine = create_engine('sqlite://')
+    query_stats.instrument_engine(engine)
+    query_stats.start_scope('test-failed-statement')
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM no_such_table"))
+        assert connection.info['query_start'] == []
+        connection.execute(text("SELECT 1"))
+        assert connection.info['query_start'] == []
+
+    statements = query_stats.scope_summary('test-failed-statement')['statements']
+    assert [s['failed'] for s in statements] == [True, False]
+    failed = next(s for s in query_stats.summary(top=1000)['top_statements'] if 'no_such_table' in s['statement'])
+    assert failed['errors'] == 1
+    engine.dispose()
+
+def test_disposed_engines_leave_no_instrumentation_record():
+    gc.collect()
+    before = len(query_stats._instrumented)
+    engine = create_engine('sqlite://')
+    query_stats.instrument_engine(engine)
+    assert len(query_stats._instrumented) == before + 1
+    engine.dispose()
+    del engine
+    gc.collect()
+    # Nothing left that a new engine reusing the same id() could be mistaken for
+    assert len(query_stats._instrumented) == before
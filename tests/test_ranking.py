@@ -0,0 +1,30 @@
+"""Hot feed paging beyond the in-memory top-N"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from ranking import HotFeed
+
+@pytest.fixture
+def db_manager(db_manager):
+    now = datetime.utcnow()
+    db_manager.add_prayer_requests_bulk(
+        {'title': f"Prayer {i}", 'prayer_type': ('emergency', 'general', 'critical')[i % 3],
+         'urgency_level': i % 10, 'created_at': now - timedelta(hours=i)}
+        for i in range(23)
+    )
+    return db_manager
+
+def walk(feed, limit):
+    pairs, cursor = [], None
+    while True:
+        ranked, cursor = feed.page(limit, cursor)
+        pairs += ranked
+        if cursor is None:
+            return pairs
+
+@pytest.mark.parametrize('limit', [1, 4, 5, 7, 30])
+def test_paging_past_capacity_matches_a_full_ranking(db_manager, limit):
+    everything = walk(HotFeed(db_manager.engine, capacity=1000), 100)
+    assert len(everything) == 23
+    assert walk(HotFeed(db_manager.engine, capacity=5), limit) == everything
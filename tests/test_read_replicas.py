@@ -0,0 +1,12 @@
+"""Replica routing across DatabaseManager instances"""
+from database import DatabaseManager
+
+def test_round_robin_continues_across_managers(tmp_path):
+    replicas = [f"sqlite:///{tmp_path / name}.db" for name in ('a', 'b', 'c')]
+    picks = []
+    for _ in range(6):
+        # AuthSystem builds a fresh manager on every Streamlit rerun
+        manager = DatabaseManager('sqlite', sqlite_path=str(tmp_path / 'primary.db'), replica_dsns=replicas)
+        assert manager.connect(announce=False)
+        picks.append(str(manager.read_engine().url))
+    assert picks == replicas * 2
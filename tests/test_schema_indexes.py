@@ -0,0 +1,28 @@
+"""Indexes declared on models reach tables created before them"""
+import logging
+
+from sqlalchemy import insert, text
+
+from database import User, ensure_indexes
+
+def index_names(engine):
+    with engine.connect() as connection:
+        return set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+
+def test_missing_indexes_are_created_on_existing_tables(db_manager, caplog):
+    engine = db_manager.engine
+    with engine.begin() as connection:
+        for name in ('ix_prayer_requests_created_id', 'ix_notifications_read_created_id', 'uq_users_email_lower'):
+            connection.execute(text(f"DROP INDEX {name}"))
+        # Case-variant duplicates an old database may hold
+        connection.execute(insert(User), [{'username': 'ruth', 'email': 'Ruth@example.com'},
+                                          {'username': 'ruth2', 'email': 'ruth@example.com'}])
+
+    with caplog.at_level(logging.WARNING, logger='vakyadharam.db'):
+        ensure_indexes(engine)
+        ensure_indexes(engine)  # idempotent
+    names = index_names(engine)
+    assert {'ix_prayer_requests_created_id', 'ix_notifications_read_created_id'} <= names
+    assert 'uq_users_email_lower' not in names
+    assert [r.getMessage().split(':')[0] for r in caplog.records if r.name == 'vakyadharam.db'] == [
+        'Could not create index uq_users_email_lower on users'] * 2
@@ -0,0 +1,16 @@
+"""Full-text indexes come with the schema, not with the first search"""
+from sqlalchemy import text
+
+import search
+
+def test_search_indexes_exist_before_any_search(db_manager, monkeypatch):
+    with db_manager.engine.connect() as connection:
+        tables = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars().all()
+    assert {'prayer_requests_fts', 'blog_posts_fts'} <= set(tables)
+
+    def no_ddl(engine):
+        raise AssertionError("search ran index DDL")
+    monkeypatch.setattr(search, 'ensure_search_indexes', no_ddl)
+    db_manager.add_prayer_request({'prayer_type': 'general', 'title': 'Healing for my mother'})
+    result = db_manager.search('healing')
+    assert [row['title'] for row in result['data']] == ['Healing for my mother']
@@ -0,0 +1,36 @@
+"""The stats rollup stays in step with prayer_requests whichever manager writes"""
+import asyncio
+
+from sqlalchemy import func, select
+
+from async_database import AsyncDatabaseManager, dispose_async_engines
+from database import DatabaseManager, PrayerStatsRollup
+
+def test_rollup_matches_live_counts_without_flag(db_manager):
+    # Writers are created without use_stats_rollup, like AuthSystem's manager
+    assert db_manager.add_prayer_request({'user_id': 1, 'prayer_type': 'healing', 'title': 'A'})['success']
+    bulk = db_manager.add_prayer_requests_bulk([
+        {'user_id': 1, 'prayer_type': 'general', 'title': 'B'},
+        {'user_id': 2, 'prayer_type': 'general', 'title': 'C', 'status': 'answered'},
+    ])
+    assert bulk['success'], bulk
+    assert db_manager.mark_prayer_answered(bulk['prayer_ids'][0])['changed']
+
+    reader = DatabaseManager('sqlite', sqlite_path=db_manager.sqlite_path, use_stats_rollup=True)
+    assert reader.connect(announce=False)
+    live = db_manager.get_dashboard_stats(use_cache=False)['stats']
+    rollup = reader.get_dashboard_stats(use_cache=False)['stats']
+    assert rollup == live
+    assert live['total_prayers'] == 3 and live['answered_prayers'] == 2
+
+def test_async_writer_maintains_rollup():
+    async def go():
+        db = AsyncDatabaseManager('sqlite', database_url='sqlite+aiosqlite://')
+        try:
+            assert await db.connect()
+            assert (await db.add_prayer_request({'user_id': 1, 'prayer_type': 'general'}))['success']
+            async with db.Session() as session:
+                return (await session.execute(select(func.sum(PrayerStatsRollup.prayer_count)))).scalar()
+        finally:
+            await dispose_async_engines()
+    assert asyncio.run(go()) == 1